@@ -1,9 +1,60 @@
 import streamlit as st
 import os
 import tempfile
-from process_ppt import create_from_template
+import time
+import uuid
+from result_cache import ResultCache
+from job_queue import JobManager, QueueFullError
+from output_store import OutputStore
+from slide_store import SlideStore
+from prescan import PrescanError, check_limits, prescan_deck
+from ingest import IngestError, ingest_upload, limits_from_env
+from template_store import build_templates, find_templates
+from profiling import format_report
 from pathlib import Path
 
+# 平行轉換使用的行程數（未設定時依 CPU 核心數）
+MAX_WORKERS = int(os.environ.get('PPT_MAX_WORKERS', '0')) or None
+
+# 結果快取設定（記憶體與磁碟上限，單位 MB；未設定磁碟目錄時只使用記憶體）
+CACHE_MEMORY_MB = int(os.environ.get('PPT_CACHE_MEMORY_MB', '256'))
+CACHE_DISK_MB = int(os.environ.get('PPT_CACHE_DISK_MB', '1024'))
+CACHE_DIR = os.environ.get('PPT_CACHE_DIR')
+
+# 上傳簡報的限制（預掃描時檢查，超過就不進行轉換；設為 0 表示不限制）
+MAX_SLIDES = int(os.environ.get('PPT_MAX_SLIDES', '1000'))
+MAX_MEDIA_MB = int(os.environ.get('PPT_MAX_MEDIA_MB', '200'))
+
+# 上傳大小、解壓後大小、部件數與單一媒體檔上限（見 ingest.limits_from_env）
+UPLOAD_LIMITS = limits_from_env()
+
+# 預覽模式轉換的投影片數（另外加上結尾頁）
+PREVIEW_SLIDES = int(os.environ.get('PPT_PREVIEW_SLIDES', '3'))
+
+# 背景工作佇列：同時執行的工作數、最多排隊數，以及查詢狀態的間隔秒數
+MAX_RUNNING_JOBS = int(os.environ.get('PPT_MAX_RUNNING_JOBS', '2'))
+MAX_QUEUED_JOBS = int(os.environ.get('PPT_MAX_QUEUED_JOBS', '8'))
+POLL_INTERVAL = 0.5
+
+# 輸出檔案暫存在磁碟（未設定資料夾時使用系統暫存資料夾）：保留秒數與每個工作階段、整體的容量上限（MB）
+OUTPUT_DIR = os.environ.get('PPT_OUTPUT_DIR')
+OUTPUT_TTL = int(os.environ.get('PPT_OUTPUT_TTL', '3600'))
+OUTPUT_SESSION_MB = int(os.environ.get('PPT_OUTPUT_SESSION_MB', '256'))
+OUTPUT_TOTAL_MB = int(os.environ.get('PPT_OUTPUT_TOTAL_MB', '4096'))
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+# 增量轉換：每張完成的投影片記錄在 PPT_SLIDE_CACHE_DIR（預設為系統暫存資料夾），重新上傳時只重新產生有變更的投影片；
+# PPT_SLIDE_CACHE_MB 為容量上限，PPT_INCREMENTAL=0 時關閉
+INCREMENTAL = os.environ.get('PPT_INCREMENTAL', '1') != '0'
+SLIDE_CACHE_DIR = os.environ.get('PPT_SLIDE_CACHE_DIR')
+SLIDE_CACHE_MB = int(os.environ.get('PPT_SLIDE_CACHE_MB', '256'))
+
+# 超過 PPT_LOW_MEMORY_MB（預設 100）的簡報以低記憶體模式轉換：圖片不讀入記憶體，直接從上傳檔串流寫進輸出；設為 0 時關閉
+LOW_MEMORY_MB = int(os.environ.get('PPT_LOW_MEMORY_MB', '100'))
+
+# 效能分析模式（cProfile + tracemalloc）：設為 0 時不在介面上提供
+ENABLE_PROFILING = os.environ.get('PPT_ENABLE_PROFILING', '1') != '0'
+
 # 設置頁面配置
 st.set_page_config(
     page_title="PPT 風格轉換器",
@@ -200,11 +251,70 @@ st.markdown("""
 st.markdown('<h1 class="title-text">🎮 PPT 魔法轉換器 🎮</h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle-text">✨ 上傳簡報，立即獲得兩種酷炫風格！✨</p>', unsafe_allow_html=True)
 
+@st.cache_resource
+def get_result_cache():
+    """所有使用者共用的轉換結果快取"""
+    return ResultCache(
+        memory_budget=CACHE_MEMORY_MB * 1024 * 1024,
+        disk_budget=CACHE_DISK_MB * 1024 * 1024,
+        disk_dir=CACHE_DIR
+    )
+
+result_cache = get_result_cache()
+
+@st.cache_resource
+def get_slide_store():
+    """所有使用者共用的投影片快取（增量轉換），關閉時回傳 None"""
+    if not INCREMENTAL:
+        return None
+    return SlideStore(
+        SLIDE_CACHE_DIR or tempfile.mkdtemp(prefix='ppt-slides-'),
+        budget=SLIDE_CACHE_MB * 1024 * 1024
+    )
+
+@st.cache_resource
+def get_job_manager():
+    """所有使用者共用的背景轉換工作佇列"""
+    return JobManager(
+        max_running=MAX_RUNNING_JOBS,
+        max_queued=MAX_QUEUED_JOBS,
+        max_workers=MAX_WORKERS,
+        result_cache=result_cache,
+        slide_store=get_slide_store(),
+        low_memory_threshold=LOW_MEMORY_MB * 1024 * 1024 if LOW_MEMORY_MB else None
+    )
+
+job_manager = get_job_manager()
+
+@st.cache_resource
+def get_output_store():
+    """所有使用者共用的輸出暫存，session state 只保留檔案代碼"""
+    return OutputStore(
+        directory=OUTPUT_DIR,
+        ttl=OUTPUT_TTL,
+        session_quota=OUTPUT_SESSION_MB * 1024 * 1024,
+        total_quota=OUTPUT_TOTAL_MB * 1024 * 1024
+    )
+
+output_store = get_output_store()
+
 # 初始化 session state
 if 'conversions' not in st.session_state:
     st.session_state.conversions = 0
 if 'output_files' not in st.session_state:
     st.session_state.output_files = []
+if 'preview_files' not in st.session_state:
+    st.session_state.preview_files = []
+    st.session_state.preview_source = None
+if 'active_job' not in st.session_state:
+    st.session_state.active_job = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.prepared_download = None
+if 'upload_check' not in st.session_state:
+    st.session_state.upload_check = None
+if 'profile_reports' not in st.session_state:
+    st.session_state.profile_reports = []
 
 # 側邊欄
 with st.sidebar:
@@ -245,6 +355,13 @@ with st.sidebar:
     if st.session_state.conversions > 0:
         st.success(f"⭐ 已生成 {st.session_state.conversions * 2} 個風格檔案！")
     
+    cache_stats = result_cache.stats()
+    st.metric("⚡ 快取命中率", f"{cache_stats['hit_rate'] * 100:.0f}%",
+              help=f"命中 {cache_stats['memory_hits'] + cache_stats['disk_hits']} 次 / 未命中 {cache_stats['misses']} 次")
+    
+    job_stats = job_manager.stats()
+    st.metric("⏳ 排隊中的轉換", job_stats['queued'], help=f"執行中 {job_stats['running']} 個")
+    
     st.markdown("---")
     st.markdown("### 🎮 成就系統")
     if st.session_state.conversions >= 10:
@@ -274,6 +391,41 @@ if uploaded_file:
         st.info(f"📦 **檔案大小**\n{uploaded_file.size / 1024:.2f} KB")
     with col_info3:
         st.warning(f"🎨 **將生成風格**\n2 種")
+    
+    # 換檔時才檢查一次（輪詢進度的重新執行沿用結果）：先分段讀取並從 zip 目錄檢查大小與部件，
+    # 再只讀取 zip 中的 XML 做快速掃描，不必等到轉換才發現檔案有問題
+    upload_check = st.session_state.upload_check
+    if upload_check is None or upload_check['signature'] != (uploaded_file.name, uploaded_file.size):
+        scan = None
+        try:
+            ingested = ingest_upload(uploaded_file, UPLOAD_LIMITS)
+            scan = prescan_deck(ingested['data'])
+            scan_problems = check_limits(scan, MAX_SLIDES, MAX_MEDIA_MB * 1024 * 1024)
+        except (IngestError, PrescanError) as e:
+            scan_problems = [str(e)]
+        upload_check = {
+            'signature': (uploaded_file.name, uploaded_file.size),
+            'scan': scan,
+            'problems': scan_problems
+        }
+        st.session_state.upload_check = upload_check
+    scan = upload_check['scan']
+    scan_problems = upload_check['problems']
+    
+    if scan is not None:
+        col_scan1, col_scan2, col_scan3 = st.columns(3)
+        with col_scan1:
+            st.metric("📑 投影片", scan['slide_count'])
+        with col_scan2:
+            st.metric("📝 文字區塊 / 🖼️ 圖片", f"{scan['text_blocks']} / {scan['pictures']}")
+        with col_scan3:
+            st.metric("💾 媒體大小", f"{scan['media_bytes'] / 1024 / 1024:.2f} MB")
+        with st.expander(f"📋 投影片標題（掃描耗時 {scan['elapsed'] * 1000:.0f} ms）"):
+            for slide in scan['slides']:
+                title = slide['title'].replace('\n', ' ').strip() or '（無標題）'
+                st.markdown(f"{slide['index'] + 1}. {title} — 文字 {slide['text_blocks']}、圖片 {slide['pictures']}")
+    for problem in scan_problems:
+        st.error(f"❌ {problem}")
 else:
     st.info("💡 上傳你的 PPT 檔案，系統將自動生成 Maeve 和水彩有機形狀兩種風格！")
 
@@ -284,10 +436,20 @@ script_dir = Path(__file__).parent.absolute()
 project_root = script_dir.parent
 template_dir = project_root / 'ppt' / 'template'
 
+
+@st.cache_resource(show_spinner="正在準備模板...")
+def get_template_files(template_dir, dir_mtime):
+    """列出模板並預先建立模板產物，讓轉換行程直接載入；資料夾內容有變動（修改時間改變）時才重新執行"""
+    for result in build_templates(template_dir):
+        if result['status'] == 'failed':
+            st.warning(f"⚠️ 無法建立模板產物 {Path(result['template']).name}: {result['error']}")
+    return find_templates(template_dir)
+
+
 # 確保目錄存在並取得模板檔案
 template_files = []
 if template_dir.exists():
-    template_files = list(template_dir.glob('*.pptx'))
+    template_files = get_template_files(str(template_dir), template_dir.stat().st_mtime_ns)
 else:
     st.error(f"❌ 找不到模板資料夾！")
     st.code(f"尋找路徑: {template_dir}")
@@ -336,103 +498,248 @@ elif len(selected_styles) == 1:
     st.info(f"已找到: {selected_styles[0][1]}")
     st.info("建議: 至少需要 2 個模板才能體驗完整功能")
 
-# 轉換按鈕
-st.markdown("<br>", unsafe_allow_html=True)
-col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
-with col_btn2:
-    convert_button = st.button("🚀 開始魔法轉換！生成兩種風格 🎨", use_container_width=True)
+def submit_conversion(kind, styles, preview_slides=None, profile=False):
+    """把轉換送進背景工作佇列，腳本不必等待轉換完成；回傳工作狀態，佇列已滿時回傳 None"""
+    try:
+        ingested = ingest_upload(uploaded_file, UPLOAD_LIMITS)
+        job_id = job_manager.submit(
+            ingested['data'], [template_path for _, _, template_path in styles], preview_slides,
+            input_digest=ingested['digest'], profile=profile
+        )
+    except IngestError as e:
+        st.error(f"❌ {e}")
+        return None
+    except QueueFullError as e:
+        st.warning(f"⏳ 伺服器忙碌中：{e}")
+        return None
+    suffix = '_preview' if preview_slides is not None else ''
+    base_name = Path(uploaded_file.name).stem
+    st.session_state.active_job = {
+        'id': job_id,
+        'kind': kind,
+        # 模板路徑 -> (顯示名稱, 模板檔名, 輸出檔名)
+        'styles': {
+            str(template_path): (display_name, file_name, f"{base_name}_{Path(file_name).stem}{suffix}.pptx")
+            for display_name, file_name, template_path in styles
+        }
+    }
+    return job_manager.status(job_id)
+
+
+def collect_finished_job():
+    """工作結束時取回結果並放進 session state；回傳進行中工作的狀態，沒有進行中的工作時回傳 None"""
+    active_job = st.session_state.active_job
+    if active_job is None:
+        return None
+    status = job_manager.status(active_job['id'])
+    if status is None:
+        st.session_state.active_job = None
+        st.error("❌ 轉換工作已失效，請重新開始")
+        return None
+    if status['state'] in ('queued', 'running'):
+        return status
+    
+    st.session_state.active_job = None
+    job_manager.forget(active_job['id'])
+    if status['state'] == 'cancelled':
+        st.info("🛑 已取消轉換")
+        return None
+    if status['error']:
+        st.error(f"❌ 轉換失敗: {status['error']}")
+    
+    output_files = []
+    profile_reports = []
+    for result in status['results']:
+        display_name, file_name, output_filename = active_job['styles'][result['template_path']]
+        if result.get('profile'):
+            profile_reports.append({
+                'style': display_name,
+                'name': f"{Path(output_filename).stem}.prof",
+                'report': result['profile']
+            })
+        if result['error']:
+            st.error(f"❌ {display_name} 轉換失敗: {result['error']}")
+            with st.expander("查看錯誤詳情"):
+                st.code(result['traceback'])
+            continue
+        if result.get('slides_reused'):
+            st.info(f"♻️ {display_name}：{result['slides_reused']}/{result['slide_count']} 張投影片沒有變更，沿用上次的結果")
+        try:
+            token = output_store.put(st.session_state.session_id, output_filename, result['data'])
+        except (OSError, ValueError) as e:
+            st.error(f"❌ {display_name} 無法儲存: {e}")
+            continue
+        output_files.append({
+            'name': output_filename,
+            'token': token,
+            'size': len(result['data']),
+            'style': display_name,
+            'file_name': file_name
+        })
+    if profile_reports:
+        st.session_state.profile_reports = profile_reports
+    # 依模板順序排列，不受完成先後影響
+    order = [names[2] for names in active_job['styles'].values()]
+    output_files.sort(key=lambda output_file: order.index(output_file['name']))
+    
+    if active_job['kind'] == 'preview':
+        discard_files(st.session_state.preview_files)
+        st.session_state.preview_files = output_files
+    elif active_job['kind'] == 'style':
+        if output_files:
+            # 已完整轉換過的其他風格保留，同一風格以新結果取代
+            names = {output_file['name'] for output_file in output_files}
+            discard_files([f for f in st.session_state.output_files if f['name'] in names])
+            st.session_state.output_files = [
+                output_file for output_file in st.session_state.output_files if output_file['name'] not in names
+            ] + output_files
+            celebrate(output_files)
+    else:
+        # 只在 session state 保留檔案代碼，內容留在磁碟以便重複下載
+        discard_files(st.session_state.output_files)
+        st.session_state.output_files = output_files
+        
+        # 顯示結果
+        if output_files:
+            celebrate(output_files)
+        else:
+            st.error("😢 所有模板轉換都失敗了，請檢查錯誤訊息。")
+    return None
+
 
-# 處理轉換
-if convert_button:
+def discard_files(files):
+    """刪除被新結果取代的輸出檔案"""
+    for output_file in files:
+        output_store.discard(output_file['token'])
+
+
+def render_download(output_file, label, key):
+    """顯示下載按鈕；按下「準備下載」才從磁碟讀取，未下載的檔案不佔用伺服器記憶體"""
+    token = output_file['token']
+    if not output_store.contains(token):
+        st.warning("⌛ 檔案已過期，請重新轉換")
+        return
+    if st.session_state.prepared_download != token:
+        if not st.button(f"📦 準備{label}（{output_file['size'] / 1024 / 1024:.1f} MB）",
+                         use_container_width=True, key=f"prepare_{key}"):
+            return
+        st.session_state.prepared_download = token
+    try:
+        with output_store.open(token) as f:
+            st.download_button(
+                label=f"📥 {label}",
+                data=f,
+                file_name=output_file['name'],
+                mime=PPTX_MIME,
+                use_container_width=True,
+                key=key
+            )
+    except KeyError:
+        st.warning("⌛ 檔案已過期，請重新轉換")
+
+
+def celebrate(output_files):
+    """完整轉換完成後的統計與成就提示"""
+    st.success(f"🎉 關卡完成！成功生成 {len(output_files)} 種風格！")
+    st.balloons()
+    
+    # 更新統計
+    st.session_state.conversions += 1
+    
+    # 顯示獎勵訊息
+    st.markdown("""
+        <div style="text-align: center; margin: 30px 0;">
+            <h2 style="color: #fbbf24; text-shadow: 0 0 20px #a855f7;">
+                🏆 任務完成！獲得獎勵 🏆
+            </h2>
+            <p style="color: #fcd34d; font-size: 1.3em; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);">
+                ✨ 成功生成酷炫風格簡報！✨
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # 成就解鎖提示
+    if st.session_state.conversions == 1:
+        st.info("🎯 成就解鎖：【新手上路】完成首次轉換！")
+    elif st.session_state.conversions == 5:
+        st.warning("⭐ 成就解鎖：【風格玩家】完成 5 次轉換！")
+    elif st.session_state.conversions == 10:
+        st.error("🏆 成就解鎖：【轉換大師】完成 10 次轉換！")
+
+
+def check_ready():
+    """確認可以開始轉換，不行時顯示原因"""
     if not uploaded_file:
         st.error("❌ 請先上傳一個 PPT 檔案！")
     elif len(selected_styles) == 0:
         st.error("❌ 找不到任何模板檔案！")
+    elif scan_problems:
+        st.error("❌ 這份簡報無法轉換，請先修正上方列出的問題！")
     else:
-        # 創建臨時目錄
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # 保存上傳的檔案到臨時目錄
-            input_path = os.path.join(temp_dir, uploaded_file.name)
-            with open(input_path, 'wb') as f:
-                f.write(uploaded_file.read())
-            
-            st.markdown('<p class="progress-text">⚡ 轉換魔法啟動中...</p>', unsafe_allow_html=True)
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # 處理每個風格
-            output_files = []
-            total_styles = len(selected_styles)
-            
-            for idx, (display_name, file_name, template_path) in enumerate(selected_styles):
-                status_text.markdown(f'<p class="progress-text">✨ 魔法進行中... {display_name} ✨</p>', unsafe_allow_html=True)
-                progress_bar.progress((idx + 0.5) / total_styles)
-                
-                # 生成輸出檔名: 原檔名_模板名.pptx
-                base_name = Path(uploaded_file.name).stem
-                template_name = Path(file_name).stem
-                output_filename = f"{base_name}_{template_name}.pptx"
-                output_path = os.path.join(temp_dir, output_filename)
-                
-                try:
-                    # 執行轉換 (input_path, template_path, output_path)
-                    create_from_template(input_path, str(template_path), output_path)
-                    
-                    # 讀取生成的檔案到記憶體
-                    with open(output_path, 'rb') as f:
-                        output_data = f.read()
-                    
-                    output_files.append({
-                        'name': output_filename,
-                        'data': output_data,
-                        'style': display_name
-                    })
-                    
-                    progress_bar.progress((idx + 1) / total_styles)
-                    
-                except Exception as e:
-                    st.error(f"❌ {display_name} 轉換失敗: {str(e)}")
-                    import traceback
-                    with st.expander("查看錯誤詳情"):
-                        st.code(traceback.format_exc())
-                    continue
-            
-            # 清理進度顯示
-            status_text.empty()
-            progress_bar.empty()
-            
-            # 儲存結果到 session state 以便重複下載
-            st.session_state.output_files = output_files
+        return True
+    return False
+
+
+# 轉換進度與結果訊息顯示在按鈕上方；背景工作結束時先取回結果
+st.markdown("<br>", unsafe_allow_html=True)
+job_panel = st.container()
+with job_panel:
+    job_status = collect_finished_job()
+
+# 效能分析模式：在分析器下轉換，完成後顯示耗時與記憶體報告（轉換會慢上數倍）
+profile_mode = ENABLE_PROFILING and st.checkbox(
+    "🔬 效能分析模式（診斷轉換特別慢的簡報，會明顯變慢）",
+    disabled=job_status is not None
+)
+
+# 轉換按鈕：先快速預覽每種風格，喜歡的再完整轉換（轉換進行中時停用）
+col_btn1, col_btn2 = st.columns(2)
+with col_btn1:
+    preview_button = st.button(f"🔍 快速預覽所有風格（前 {PREVIEW_SLIDES} 張 + 結尾）",
+                               use_container_width=True, disabled=job_status is not None)
+with col_btn2:
+    convert_button = st.button("🚀 開始魔法轉換！生成兩種風格 🎨", use_container_width=True,
+                               disabled=job_status is not None)
+
+# 上傳的檔案換了就不再顯示舊的預覽
+upload_signature = (uploaded_file.name, uploaded_file.size) if uploaded_file else None
+if st.session_state.preview_source != upload_signature and st.session_state.preview_files:
+    discard_files(st.session_state.preview_files)
+    st.session_state.preview_files = []
+
+# 上傳的檔案直接在記憶體中處理，不寫入暫存檔
+if preview_button and check_ready():
+    job_status = submit_conversion('preview', selected_styles, preview_slides=PREVIEW_SLIDES, profile=profile_mode)
+    st.session_state.preview_source = upload_signature
+if convert_button and check_ready():
+    job_status = submit_conversion('full', selected_styles, profile=profile_mode)
+
+# 顯示預覽，每個風格可以單獨完整轉換
+if st.session_state.preview_files:
+    st.markdown('<div class="game-card">', unsafe_allow_html=True)
+    st.markdown("### 🔍 風格預覽 - 挑一個喜歡的再完整轉換")
+    
+    full_style = None
+    cols = st.columns(len(st.session_state.preview_files))
+    for idx, preview_file in enumerate(st.session_state.preview_files):
+        with cols[idx]:
+            st.markdown(f"""
+            <div class="download-card">
+                <h3 style="color: #fbbf24; margin: 10px 0;">{preview_file['style']}</h3>
+                <p style="color: white; margin: 5px 0;">📄 {preview_file['name']}</p>
+            </div>
+            """, unsafe_allow_html=True)
             
-            # 顯示結果
-            if output_files:
-                st.success(f"🎉 關卡完成！成功生成 {len(output_files)} 種風格！")
-                st.balloons()
-                
-                # 更新統計
-                st.session_state.conversions += 1
-                
-                # 顯示獎勵訊息
-                st.markdown("""
-                    <div style="text-align: center; margin: 30px 0;">
-                        <h2 style="color: #fbbf24; text-shadow: 0 0 20px #a855f7;">
-                            🏆 任務完成！獲得獎勵 🏆
-                        </h2>
-                        <p style="color: #fcd34d; font-size: 1.3em; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);">
-                            ✨ 成功生成酷炫風格簡報！✨
-                        </p>
-                    </div>
-                """, unsafe_allow_html=True)
-                
-                # 成就解鎖提示
-                if st.session_state.conversions == 1:
-                    st.info("🎯 成就解鎖：【新手上路】完成首次轉換！")
-                elif st.session_state.conversions == 5:
-                    st.warning("⭐ 成就解鎖：【風格玩家】完成 5 次轉換！")
-                elif st.session_state.conversions == 10:
-                    st.error("🏆 成就解鎖：【轉換大師】完成 10 次轉換！")
-            else:
-                st.error("😢 所有模板轉換都失敗了，請檢查錯誤訊息。")
+            render_download(preview_file, "下載預覽", f"preview_download_{idx}")
+            if st.button("🚀 完整轉換此風格", use_container_width=True,
+                         key=f"full_convert_{idx}", disabled=job_status is not None):
+                full_style = preview_file['file_name']
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    if full_style is not None and check_ready():
+        job_status = submit_conversion('style', [style for style in selected_styles if style[1] == full_style],
+                                       profile=profile_mode)
 
 # 顯示已生成的檔案（即使不在轉換按鈕區塊內也能下載）
 if st.session_state.output_files:
@@ -449,17 +756,35 @@ if st.session_state.output_files:
             </div>
             """, unsafe_allow_html=True)
             
-            st.download_button(
-                label=f"📥 下載 {output_file['style']}",
-                data=output_file['data'],
-                file_name=output_file['name'],
-                mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                use_container_width=True,
-                key=f"persistent_download_{idx}"
-            )
+            render_download(output_file, f"下載 {output_file['style']}", f"persistent_download_{idx}")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+# 最近一次效能分析的報告，可下載 .prof 以 snakeviz 或 python -m pstats 深入查看
+for idx, profile_report in enumerate(st.session_state.profile_reports):
+    report = profile_report['report']
+    with st.expander(f"🔬 效能分析報告 - {profile_report['style']}"
+                     f"（{report['elapsed']:.2f} 秒，峰值記憶體 {report['peak_memory'] / 1024 / 1024:.1f} MB）"):
+        st.code(format_report(report), language=None)
+        st.download_button(
+            label="📥 下載 .prof",
+            data=report['prof'],
+            file_name=profile_report['name'],
+            mime="application/octet-stream",
+            key=f"profile_download_{idx}"
+        )
+
+# 轉換在背景進行：顯示進度後稍等再重新執行腳本查詢狀態
+if job_status is not None:
+    with job_panel:
+        if job_status['state'] == 'queued':
+            st.info(f"⏳ 排隊中，前面還有 {job_status['position'] - 1} 個工作...")
+        else:
+            st.markdown(f'<p class="progress-text">✨ 魔法進行中... {job_status["message"]} ✨</p>', unsafe_allow_html=True)
+        st.progress(job_status['progress'])
+        if job_status['state'] == 'queued' and st.button("🛑 取消排隊"):
+            job_manager.cancel(job_status['id'])
+
 # 頁尾
 st.markdown("<br><br>", unsafe_allow_html=True)
 st.markdown("""
@@ -474,3 +799,7 @@ st.markdown("""
         </div>
     </div>
 """, unsafe_allow_html=True)
+
+if job_status is not None:
+    time.sleep(POLL_INTERVAL)
+    st.rerun()
@@ -0,0 +1,184 @@
+"""批次轉換：將多份簡報套用到模板資料夾中的每一個模板
+
+    python batch_convert.py "decks/**/*.pptx" --output-dir out --workers 8
+
+每完成一個（簡報 × 模板）工作就寫入清單檔（manifest），中途中斷後重新執行時會略過已完成的工作。
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from process_ppt import run_conversion_jobs
+from slide_store import SlideStore
+
+PROJECT_ROOT = Path(__file__).parent.absolute().parent
+DEFAULT_TEMPLATE_DIR = PROJECT_ROOT / 'ppt' / 'template'
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def expand_inputs(patterns):
+    """展開輸入的 glob，去除重複並排序"""
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) or ([pattern] if os.path.isfile(pattern) else [])
+        for match in matches:
+            if match.lower().endswith('.pptx') and os.path.isfile(match):
+                paths.add(os.path.abspath(match))
+    return sorted(paths)
+
+
+def job_key(input_path, template_path):
+    """工作的識別鍵：輸入或模板檔案有變動時視為新的工作"""
+    input_stat = os.stat(input_path)
+    template_stat = os.stat(template_path)
+    return (
+        f"{input_path}|{input_stat.st_size}|{input_stat.st_mtime_ns}|"
+        f"{template_path}|{template_stat.st_size}|{template_stat.st_mtime_ns}"
+    )
+
+
+def load_manifest(manifest_path):
+    """讀取清單檔中已成功完成的工作；最後一行若因當機而不完整則忽略"""
+    finished = {}
+    if not os.path.exists(manifest_path):
+        return finished
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get('status') == 'ok':
+                finished[entry['key']] = entry
+            else:
+                finished.pop(entry.get('key'), None)
+    return finished
+
+
+def append_manifest(manifest_file, entry):
+    """每筆結果立即寫入並同步到磁碟，確保當機後仍可續跑"""
+    manifest_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    manifest_file.flush()
+    os.fsync(manifest_file.fileno())
+
+
+def build_jobs(inputs, templates, output_dir, finished):
+    """組出尚未完成的（簡報 × 模板）工作，回傳 (待執行工作, 略過數)"""
+    jobs = []
+    skipped = 0
+    for input_path in inputs:
+        for template_path in templates:
+            output_path = os.path.join(output_dir, f"{Path(input_path).stem}_{Path(template_path).stem}.pptx")
+            key = job_key(input_path, template_path)
+            done = finished.get(key)
+            if done and done.get('output') == output_path and os.path.exists(output_path):
+                skipped += 1
+                continue
+            jobs.append((input_path, template_path, output_path, key))
+    return jobs, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批次將簡報套用到模板資料夾中的所有模板")
+    parser.add_argument('inputs', nargs='+', help="輸入簡報的路徑或 glob（支援 **）")
+    parser.add_argument('--template-dir', default=str(DEFAULT_TEMPLATE_DIR), help="模板資料夾")
+    parser.add_argument('--output-dir', required=True, help="輸出資料夾")
+    parser.add_argument('--workers', type=int, default=None, help="平行行程數（預設為 CPU 核心數）")
+    parser.add_argument('--slide-cache', help="投影片快取資料夾；重新轉換只改了幾張的簡報時只重新產生有變更的投影片")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="低記憶體模式：圖片不讀入記憶體，直接從輸入串流寫進輸出（適合媒體很多的大型簡報）")
+    parser.add_argument('--manifest', help=f"清單檔路徑（預設為輸出資料夾中的 {MANIFEST_NAME}）")
+    parser.add_argument('-v', '--verbose', action='store_true', help="顯示詳細記錄")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s %(levelname)s %(processName)s %(message)s'
+    )
+
+    inputs = expand_inputs(args.inputs)
+    templates = sorted(os.path.abspath(p) for p in Path(args.template_dir).glob('*.pptx'))
+    if not inputs:
+        print("❌ 找不到任何輸入簡報", file=sys.stderr)
+        return 2
+    if not templates:
+        print(f"❌ 模板資料夾中沒有 .pptx: {args.template_dir}", file=sys.stderr)
+        return 2
+
+    # 輸出檔名為 原檔名_模板名.pptx，不同資料夾的同名簡報會互相覆蓋
+    stems = {}
+    for input_path in inputs:
+        stems.setdefault(Path(input_path).stem, []).append(input_path)
+    duplicates = {stem: paths for stem, paths in stems.items() if len(paths) > 1}
+    if duplicates:
+        print("❌ 以下簡報檔名重複，輸出會互相覆蓋:", file=sys.stderr)
+        for paths in duplicates.values():
+            for path in paths:
+                print(f"  {path}", file=sys.stderr)
+        return 2
+
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(output_dir, MANIFEST_NAME)
+    finished = load_manifest(manifest_path)
+    jobs, skipped = build_jobs(inputs, templates, output_dir, finished)
+
+    print(f"📂 {len(inputs)} 份簡報 × {len(templates)} 個模板 = {len(inputs) * len(templates)} 個工作")
+    if skipped:
+        print(f"⏭️  略過 {skipped} 個已完成的工作（{manifest_path}）")
+    if not jobs:
+        print("✅ 沒有需要執行的工作")
+        return 0
+
+    keys = {output_path: key for _, _, output_path, key in jobs}
+    started = time.perf_counter()
+    completed = 0
+    failed = 0
+    total_slides = 0
+
+    with open(manifest_path, 'a', encoding='utf-8') as manifest_file:
+        results = run_conversion_jobs(
+            [(input_path, template_path, output_path) for input_path, template_path, output_path, _ in jobs],
+            max_workers=args.workers,
+            slide_store=SlideStore(args.slide_cache) if args.slide_cache else None,
+            low_memory=args.low_memory
+        )
+        for index, result in enumerate(results, start=1):
+            name = f"{Path(result['input_path']).name} × {Path(result['template_path']).stem}"
+            entry = {
+                'key': keys[result['output_path']],
+                'input': result['input_path'],
+                'template': result['template_path'],
+                'output': result['output_path'],
+                'slides': result['slide_count'],
+                'elapsed': round(result['elapsed'], 3),
+                'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            if result['error']:
+                failed += 1
+                entry['status'] = 'error'
+                entry['error'] = result['error']
+                print(f"[{index}/{len(jobs)}] ❌ {name}: {result['error']}")
+                logging.getLogger(__name__).debug(result['traceback'])
+            else:
+                completed += 1
+                total_slides += result['slide_count']
+                entry['status'] = 'ok'
+                print(f"[{index}/{len(jobs)}] ✅ {name}（{result['slide_count']} 張，{result['elapsed']:.1f} 秒）")
+            append_manifest(manifest_file, entry)
+
+    elapsed = time.perf_counter() - started
+    print(f"\n=== 完成 ===")
+    print(f"成功 {completed} 個，失敗 {failed} 個，耗時 {elapsed:.1f} 秒")
+    if elapsed > 0:
+        print(f"吞吐量: {completed / elapsed * 60:.1f} 份簡報/分鐘，{total_slides / elapsed:.1f} 張投影片/秒")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""轉換引擎效能測試
+
+以 python-pptx 在本機產生合成簡報（可調整投影片數、每張的文字框數、圖片數與圖片尺寸），
+對內建模板執行轉換，記錄各階段耗時、峰值記憶體與輸出大小，並與儲存的基準 JSON 比較。
+
+    python benchmark.py                       # 執行預設案例
+    python benchmark.py --save-baseline       # 將結果存成新的基準
+    python benchmark.py --case 100:5:2:512    # 自訂案例（投影片:文字框:圖片:圖片邊長）
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+import process_ppt
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = Path(__file__).parent.absolute().parent
+DEFAULT_TEMPLATE = PROJECT_ROOT / 'ppt' / 'template' / 'Maeve.pptx'
+DEFAULT_BASELINE = PROJECT_ROOT / 'benchmarks' / 'baseline.json'
+
+# (投影片數, 每張文字框數, 每張圖片數, 圖片邊長 px)
+DEFAULT_CASES = [
+    (10, 3, 1, 256),
+    (50, 5, 2, 512),
+    (200, 5, 2, 512),
+    (50, 2, 6, 1024),
+]
+QUICK_CASES = DEFAULT_CASES[:2]
+
+# 各項指標對應的轉換階段（來自 process_ppt 的進度事件）
+PHASE_METRICS = {
+    'analyze_input_slide': 'analyze',
+    'copy_all_shapes_from_template': 'copy_shapes',
+    'copy_images_from_input': 'copy_images',
+}
+
+
+def case_name(slides, text_shapes, images, image_size):
+    return f"s{slides}-t{text_shapes}-i{images}-{image_size}px"
+
+
+def generate_deck(path, slides, text_shapes, images, image_size):
+    """產生合成簡報：第一張為標題頁，其餘為標題 + 內文 + 額外文字框 + 圖片"""
+    prs = Presentation()
+    for i in range(slides):
+        layout = prs.slide_layouts[0 if i == 0 else 1]
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"投影片 {i + 1} 的標題"
+        if i > 0:
+            slide.placeholders[1].text = "\n".join(f"第 {k + 1} 點內容" for k in range(4))
+        for k in range(max(text_shapes - 2, 0)):
+            box = slide.shapes.add_textbox(Inches(0.5 + k % 3 * 3), Inches(5 + k // 3 * 0.6), Inches(2.8), Inches(0.5))
+            box.text = f"補充說明 {i + 1}-{k + 1}"
+        for k in range(images):
+            # 每張圖片顏色不同，避免被去重後失去測試意義
+            color = ((i * 37 + k * 11) % 256, (i * 17) % 256, (k * 53) % 256)
+            image_path = os.path.join(os.path.dirname(path), f"img_{i}_{k}.png")
+            Image.new('RGB', (image_size, image_size), color).save(image_path)
+            slide.shapes.add_picture(image_path, Inches(6 + k % 3), Inches(1 + k // 3), Inches(1), Inches(1))
+            os.remove(image_path)
+    prs.save(path)
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 單位為 KB，macOS 為 bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _run_case(input_path, template_path, repeats):
+    """在獨立子行程中執行單一案例，讓峰值記憶體不受其他案例影響"""
+    # 合成簡報會觸發「內容放不下」之類的警告，測試時不需要
+    logging.getLogger(process_ppt.__name__).setLevel(logging.ERROR)
+    runs = []
+    output_size = 0
+    for _ in range(repeats):
+        phase_totals = {}
+
+        def on_progress(event):
+            phase_totals[event['phase']] = phase_totals.get(event['phase'], 0.0) + event['elapsed']
+
+        started = time.perf_counter()
+        output_size = len(process_ppt.convert_to_bytes(input_path, template_path, on_progress))
+        run = {'create_from_template': time.perf_counter() - started}
+        for metric, phase in PHASE_METRICS.items():
+            run[metric] = phase_totals.get(phase, 0.0)
+        runs.append(run)
+
+    return {
+        # 第一次包含模板編譯，其餘取中位數代表暖機後的表現
+        'cold_wall': runs[0]['create_from_template'],
+        'timings': {
+            metric: statistics.median(run[metric] for run in runs[1:] or runs)
+            for metric in runs[0]
+        },
+        'peak_rss': _peak_rss_bytes(),
+        'output_size': output_size,
+    }
+
+
+def run_benchmarks(cases, template_path, repeats=3):
+    """執行所有案例並回傳結果 dict"""
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for slides, text_shapes, images, image_size in cases:
+            name = case_name(slides, text_shapes, images, image_size)
+            input_path = os.path.join(temp_dir, f"{name}.pptx")
+            generate_deck(input_path, slides, text_shapes, images, image_size)
+
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_run_case, input_path, str(template_path), repeats).result()
+            result['input_size'] = os.path.getsize(input_path)
+            results[name] = result
+            print(format_result(name, result), flush=True)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'engine_version': process_ppt.ENGINE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'template': Path(template_path).name,
+        'repeats': repeats,
+        'cases': results,
+    }
+
+
+def format_result(name, result):
+    timings = result['timings']
+    rss = result['peak_rss']
+    return (
+        f"{name:<24} 總計 {timings['create_from_template'] * 1000:8.1f} ms"
+        f"（冷啟動 {result['cold_wall'] * 1000:8.1f} ms）"
+        f" 分析 {timings['analyze_input_slide'] * 1000:7.1f} ms"
+        f" 形狀 {timings['copy_all_shapes_from_template'] * 1000:7.1f} ms"
+        f" 圖片 {timings['copy_images_from_input'] * 1000:7.1f} ms"
+        f" RSS {rss / 1024 / 1024 if rss else 0:7.1f} MB"
+        f" 輸出 {result['output_size'] / 1024:8.1f} KB"
+    )
+
+
+def compare_with_baseline(report, baseline, threshold):
+    """與基準比較，回傳超過門檻的退步項目列表"""
+    regressions = []
+    for name, result in report['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if base is None:
+            continue
+        checks = [(metric, value, base['timings'].get(metric)) for metric, value in result['timings'].items()]
+        checks.append(('peak_rss', result['peak_rss'], base.get('peak_rss')))
+        checks.append(('output_size', result['output_size'], base.get('output_size')))
+        for metric, value, base_value in checks:
+            if not value or not base_value:
+                continue
+            change = (value - base_value) / base_value
+            print(f"  {name:<24} {metric:<30} {change * 100:+7.1f}%")
+            if change > threshold:
+                regressions.append((name, metric, base_value, value, change))
+    return regressions
+
+
+def parse_case(text):
+    try:
+        slides, text_shapes, images, image_size = (int(v) for v in text.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError("案例格式為 投影片:文字框:圖片:圖片邊長，例如 100:5:2:512")
+    return slides, text_shapes, images, image_size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PPT 轉換引擎效能測試")
+    parser.add_argument('--template', default=str(DEFAULT_TEMPLATE), help="模板檔案")
+    parser.add_argument('--case', action='append', type=parse_case, help="自訂案例 投影片:文字框:圖片:圖片邊長，可重複指定")
+    parser.add_argument('--quick', action='store_true', help="只執行較小的案例")
+    parser.add_argument('--repeats', type=int, default=3, help="每個案例重複次數")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="基準 JSON 路徑")
+    parser.add_argument('--save-baseline', action='store_true', help="將這次結果寫入基準檔")
+    parser.add_argument('--threshold', type=float, default=0.2, help="視為退步的比例門檻（預設 0.2 = 20%%）")
+    parser.add_argument('--output', help="另外將結果寫入此 JSON 檔")
+    args = parser.parse_args(argv)
+
+    cases = args.case or (QUICK_CASES if args.quick else DEFAULT_CASES)
+    report = run_benchmarks(cases, args.template, max(args.repeats, 1))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n已儲存基準: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n找不到基準檔 {args.baseline}，以 --save-baseline 建立")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n與基準比較（{baseline.get('created')}，引擎 {baseline.get('engine_version')}）:")
+    regressions = compare_with_baseline(report, baseline, args.threshold)
+    if regressions:
+        print(f"\n!! 發現 {len(regressions)} 項效能退步超過 {args.threshold * 100:.0f}%:")
+        for name, metric, base_value, value, change in regressions:
+            print(f"  {name} {metric}: {base_value:.4g} -> {value:.4g} ({change * 100:+.1f}%)")
+        return 1
+    print("\n沒有超過門檻的退步")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
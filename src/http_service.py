@@ -0,0 +1,407 @@
+"""不需要網頁介面的 HTTP 轉換服務
+
+讓其他系統以程式呼叫轉換引擎：上傳 .pptx（multipart/form-data 或直接以請求內容傳送），
+回應套用模板後的簡報；指定多個模板時回應包含各輸出簡報的 zip。
+
+    python http_service.py --port 8502
+    curl -F file=@deck.pptx "http://127.0.0.1:8502/convert?template=Maeve" -o deck_Maeve.pptx
+    curl --data-binary @deck.pptx -H "Content-Type: application/octet-stream" \\
+         "http://127.0.0.1:8502/convert?name=deck.pptx" -o decks.zip
+
+端點：
+    POST /convert     參數 template（模板名稱，可重複，未指定時套用全部模板）、preview（只轉換前 N 張與結尾頁）、
+                      name（直接上傳時的檔名）
+    GET  /templates   可用的模板名稱
+    GET  /healthz     服務狀態、進行中的轉換數與快取統計
+
+連線使用 HTTP/1.1 keep-alive；同時進行的轉換超過上限時立即回應 429 與 Retry-After，不排隊等待。
+轉換在 process_ppt 的共用行程池中執行，各行程的已編譯模板快取與結果快取在所有請求間共用，
+啟動時會先建立模板產物並讓行程池載入模板。
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import zipfile
+from email.parser import BytesParser
+from email.policy import HTTP
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, urlsplit
+
+from ingest import IngestError, check_archive, limits_from_env
+from prescan import PrescanError, check_limits, prescan_deck
+from process_ppt import convert_templates_parallel, warm_process_pool
+from result_cache import ResultCache, hash_bytes
+from slide_store import SlideStore
+from template_store import build_templates, find_templates
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.absolute().parent
+DEFAULT_TEMPLATE_DIR = PROJECT_ROOT / 'ppt' / 'template'
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+# 回應內容分段寫出的區塊大小
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+# 閒置的 keep-alive 連線保留秒數
+KEEP_ALIVE_TIMEOUT = 60
+
+# multipart 的邊界與標頭不計入上傳大小上限的額外容許量
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class ServiceError(Exception):
+    """以指定 HTTP 狀態碼回應給呼叫端的錯誤"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class ConversionService:
+    """HTTP 請求共用的轉換狀態：模板、同時轉換數上限、結果快取與投影片快取"""
+
+    def __init__(self, template_dir=DEFAULT_TEMPLATE_DIR, max_concurrent=4, max_workers=None, result_cache=None,
+                 slide_store=None, upload_limits=None, max_slides=1000, max_media_bytes=200 * 1024 * 1024,
+                 retry_after=5, low_memory_threshold=None):
+        self.template_dir = template_dir
+        self.templates = {path.stem: str(path) for path in find_templates(template_dir)}
+        self.max_concurrent = max_concurrent
+        self.max_workers = max_workers
+        self.result_cache = result_cache
+        self.slide_store = slide_store
+        self.upload_limits = upload_limits or limits_from_env()
+        self.max_slides = max_slides
+        self.max_media_bytes = max_media_bytes
+        self.retry_after = retry_after
+        self.low_memory_threshold = low_memory_threshold
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._active = 0
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def warm(self):
+        """建立模板產物並讓行程池載入模板，回傳已暖機的行程數"""
+        for result in build_templates(self.template_dir):
+            if result['status'] == 'failed':
+                logger.warning("無法建立模板產物 %s: %s", result['template'], result['error'])
+        if not self.templates:
+            return 0
+        return warm_process_pool(self.templates.values(), self.max_workers)
+
+    def acquire(self):
+        """取得一個轉換名額，已滿時丟出 429 的 ServiceError"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ServiceError(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                f"同時進行的轉換已達上限 {self.max_concurrent}，請稍後再試",
+                {'Retry-After': str(self.retry_after)}
+            )
+        with self._lock:
+            self._active += 1
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'active': self._active,
+                'max_concurrent': self.max_concurrent,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'templates': sorted(self.templates)
+            }
+        if self.result_cache is not None:
+            stats['cache'] = self.result_cache.stats()
+        return stats
+
+    def resolve_templates(self, names):
+        """將模板名稱轉成路徑（只接受模板資料夾中的檔案），未指定時回傳全部模板"""
+        if not names:
+            if not self.templates:
+                raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, "模板資料夾中沒有任何模板")
+            return list(self.templates.values())
+        paths = []
+        for name in names:
+            stem = Path(name).stem
+            if stem not in self.templates:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"找不到模板 {name}，可用的模板: {', '.join(sorted(self.templates))}")
+            if self.templates[stem] not in paths:
+                paths.append(self.templates[stem])
+        return paths
+
+    def check_upload(self, data):
+        """與網頁上傳相同的檢查：zip 結構與大小，以及投影片數與媒體大小"""
+        try:
+            check_archive(data, self.upload_limits)
+            problems = check_limits(prescan_deck(data), self.max_slides, self.max_media_bytes)
+        except (IngestError, PrescanError) as e:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, str(e))
+        if problems:
+            raise ServiceError(HTTPStatus.UNPROCESSABLE_ENTITY, '；'.join(problems))
+
+    def convert(self, data, template_paths, preview_slides=None):
+        """轉換上傳內容，回傳依 template_paths 順序排列的結果列表（先查結果快取）"""
+        variant = f"preview{preview_slides}" if preview_slides is not None else None
+        input_digest = hash_bytes(data) if self.result_cache is not None else None
+        results = {}
+        cache_keys = {}
+        pending = []
+        for template_path in template_paths:
+            if self.result_cache is not None:
+                cache_keys[template_path] = ResultCache.make_key(input_digest, template_path, variant)
+                cached_data = self.result_cache.get(cache_keys[template_path])
+                if cached_data is not None:
+                    results[template_path] = {'template_path': template_path, 'data': cached_data, 'error': None}
+                    continue
+            pending.append((template_path, None))
+
+        if pending:
+            low_memory = self.low_memory_threshold is not None and len(data) >= self.low_memory_threshold
+            for result in convert_templates_parallel(data, pending, max_workers=self.max_workers,
+                                                     preview_slides=preview_slides, slide_store=self.slide_store,
+                                                     low_memory=low_memory):
+                if not result['error'] and self.result_cache is not None:
+                    self.result_cache.put(cache_keys[result['template_path']], result['data'])
+                results[result['template_path']] = result
+
+        with self._lock:
+            self.completed += 1
+        return [results[template_path] for template_path in template_paths]
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """轉換服務的請求處理（每個連線一個執行緒，連線可重複使用）"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PPTConverter/1.0'
+    timeout = KEEP_ALIVE_TIMEOUT
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/healthz':
+            self._send_json(HTTPStatus.OK, dict(self.service.stats(), status='ok'))
+        elif path == '/templates':
+            self._send_json(HTTPStatus.OK, {'templates': sorted(self.service.templates)})
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f"找不到 {path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/convert':
+            self._reject(HTTPStatus.NOT_FOUND, f"找不到 {url.path}")
+            return
+        try:
+            self._convert(parse_qs(url.query))
+        except ServiceError as e:
+            self._reject(e.status, str(e), e.headers)
+        except Exception as e:
+            logger.exception("轉換請求失敗")
+            self._reject(HTTPStatus.INTERNAL_SERVER_ERROR, f"轉換失敗: {e}")
+
+    def _convert(self, query):
+        started = time.perf_counter()
+        # 先檢查參數與名額再讀取請求內容，被拒絕的上傳不必整份傳完
+        template_paths = self.service.resolve_templates(query.get('template'))
+        preview_slides = None
+        if query.get('preview'):
+            try:
+                preview_slides = int(query['preview'][0])
+            except ValueError:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "preview 必須是整數")
+            if preview_slides < 1:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "preview 必須大於 0")
+        length = self._content_length()
+
+        self.service.acquire()
+        try:
+            body = self._read_body(length)
+            data, filename = self._extract_upload(body, query)
+            del body
+            self.service.check_upload(data)
+            results = self.service.convert(data, template_paths, preview_slides)
+        finally:
+            self.service.release()
+
+        stem = Path(filename).stem or 'presentation'
+        suffix = '_preview' if preview_slides is not None else ''
+        succeeded = [result for result in results if not result['error']]
+        failed = [result for result in results if result['error']]
+        if not succeeded:
+            errors = {Path(result['template_path']).stem: result['error'] for result in failed}
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "轉換失敗", 'templates': errors})
+            return
+
+        headers = {}
+        if failed:
+            headers['X-Failed-Templates'] = ','.join(quote(Path(result['template_path']).stem) for result in failed)
+        if len(template_paths) == 1:
+            output_name = f"{stem}_{Path(template_paths[0]).stem}{suffix}.pptx"
+            payload = succeeded[0]['data']
+            content_type = PPTX_MIME
+        else:
+            output_name = f"{stem}{suffix}.zip"
+            payload = self._zip_results(stem, suffix, succeeded)
+            content_type = 'application/zip'
+        logger.info("轉換 %s × %d 個模板: %.2f 秒", filename, len(template_paths), time.perf_counter() - started)
+        self._send_bytes(HTTPStatus.OK, payload, content_type, output_name, headers)
+
+    def _content_length(self):
+        """讀取 Content-Length；不支援 chunked 上傳，超過上限時不讀取內容直接拒絕"""
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            raise ServiceError(HTTPStatus.LENGTH_REQUIRED, "不支援 chunked 上傳，請提供 Content-Length")
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            raise ServiceError(HTTPStatus.LENGTH_REQUIRED, "缺少 Content-Length")
+        max_bytes = self.service.upload_limits['max_compressed_bytes']
+        if length > max_bytes + MULTIPART_OVERHEAD:
+            raise ServiceError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"檔案大小 {length / 1024 / 1024:.1f} MB 超過上限 {max_bytes / 1024 / 1024:.0f} MB"
+            )
+        if length <= 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "請求內容是空的")
+        return length
+
+    def _read_body(self, length):
+        buffer = io.BytesIO()
+        remaining = length
+        while remaining:
+            chunk = self.rfile.read(min(remaining, WRITE_CHUNK_SIZE))
+            if not chunk:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "上傳內容不完整")
+            buffer.write(chunk)
+            remaining -= len(chunk)
+        return buffer.getvalue()
+
+    def _extract_upload(self, body, query):
+        """取出上傳的簡報與檔名：multipart 時取第一個檔案欄位，否則整個請求內容就是簡報"""
+        content_type = self.headers.get('Content-Type', '')
+        if not content_type.lower().startswith('multipart/form-data'):
+            return body, query.get('name', ['presentation.pptx'])[0]
+
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body
+        )
+        if not message.is_multipart():
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "multipart 格式錯誤")
+        for part in message.iter_parts():
+            if part.get_filename() is not None or part.get_param('name', header='content-disposition') == 'file':
+                return part.get_payload(decode=True) or b'', part.get_filename() or 'presentation.pptx'
+        raise ServiceError(HTTPStatus.BAD_REQUEST, "multipart 中沒有檔案欄位")
+
+    @staticmethod
+    def _zip_results(stem, suffix, results):
+        # .pptx 本身已是壓縮檔，直接存入不再壓縮
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+            for result in results:
+                archive.writestr(f"{stem}_{Path(result['template_path']).stem}{suffix}.pptx", result['data'])
+        return buffer.getvalue()
+
+    def _reject(self, status, message, headers=None):
+        # 請求內容可能還沒讀取，回應後關閉連線，避免剩下的內容被當成下一個請求
+        self.close_connection = True
+        self._send_json(status, {'error': message}, dict(headers or {}, Connection='close'))
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send_bytes(status, body, 'application/json; charset=utf-8', None, headers)
+
+    def _send_bytes(self, status, data, content_type, filename=None, headers=None):
+        """以固定長度回應並分段寫出內容，連線可繼續用於下一個請求"""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if filename:
+            self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{quote(filename)}")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        view = memoryview(data)
+        for offset in range(0, len(view), WRITE_CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + WRITE_CHUNK_SIZE])
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+def make_server(service, host='127.0.0.1', port=8502):
+    """建立 HTTP 伺服器（port 為 0 時由系統指定），呼叫端負責 serve_forever 與 server_close"""
+    server = ThreadingHTTPServer((host, port), ConversionRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PPT 風格轉換 HTTP 服務")
+    parser.add_argument('--host', default=os.environ.get('PPT_HTTP_HOST', '127.0.0.1'), help="監聽位址")
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PPT_HTTP_PORT', '8502')), help="監聽埠號")
+    parser.add_argument('--template-dir', default=str(DEFAULT_TEMPLATE_DIR), help="模板資料夾")
+    parser.add_argument('--max-concurrent', type=int, default=int(os.environ.get('PPT_HTTP_MAX_CONCURRENT', '4')),
+                        help="同時進行的轉換數上限，超過時回應 429")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('PPT_MAX_WORKERS', '0')) or None,
+                        help="轉換行程數（預設為 CPU 核心數）")
+    parser.add_argument('--cache-mb', type=int, default=int(os.environ.get('PPT_CACHE_MEMORY_MB', '256')),
+                        help="結果快取的記憶體上限（MB），0 表示不快取")
+    parser.add_argument('--slide-cache', default=os.environ.get('PPT_SLIDE_CACHE_DIR'),
+                        help="投影片快取資料夾（增量轉換）")
+    parser.add_argument('--low-memory-mb', type=int, default=int(os.environ.get('PPT_LOW_MEMORY_MB', '100')),
+                        help="超過此大小（MB）的上傳以低記憶體模式轉換，0 表示關閉")
+    parser.add_argument('-v', '--verbose', action='store_true', help="顯示每個請求的記錄")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(message)s')
+
+    service = ConversionService(
+        template_dir=args.template_dir,
+        max_concurrent=max(args.max_concurrent, 1),
+        max_workers=args.workers,
+        result_cache=ResultCache(memory_budget=args.cache_mb * 1024 * 1024) if args.cache_mb else None,
+        slide_store=SlideStore(args.slide_cache) if args.slide_cache else None,
+        max_slides=int(os.environ.get('PPT_MAX_SLIDES', '1000')),
+        max_media_bytes=int(os.environ.get('PPT_MAX_MEDIA_MB', '200')) * 1024 * 1024,
+        low_memory_threshold=args.low_memory_mb * 1024 * 1024 if args.low_memory_mb else None
+    )
+    if not service.templates:
+        print(f"❌ 模板資料夾中沒有 .pptx: {args.template_dir}", file=sys.stderr)
+        return 2
+    started = time.perf_counter()
+    workers = service.warm()
+    print(f"🔥 已在 {workers} 個轉換行程載入 {len(service.templates)} 個模板（{time.perf_counter() - started:.1f} 秒）")
+
+    server = make_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"🚀 轉換服務已啟動: http://{host}:{port}（同時轉換上限 {service.max_concurrent}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
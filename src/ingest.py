@@ -0,0 +1,118 @@
+"""上傳簡報的接收與安全檢查
+
+以固定大小的區塊讀取上傳內容，超過大小上限立即停止；再從 zip 目錄檢查解壓後大小、
+部件數、最大媒體部件與壓縮比，讓惡意或過大的簡報在交給 python-pptx 解壓之前就被擋下。
+"""
+import hashlib
+import io
+import os
+import zipfile
+
+CHUNK_SIZE = 1024 * 1024
+MB = 1024 * 1024
+
+DEFAULT_LIMITS = {
+    'max_compressed_bytes': 100 * MB,
+    'max_uncompressed_bytes': 500 * MB,
+    'max_parts': 5000,
+    'max_media_part_bytes': 50 * MB,
+    # 正常的簡報 XML 壓縮比約 5–20 倍，遠超過時幾乎都是 zip bomb
+    'max_compression_ratio': 200,
+}
+
+
+class IngestError(ValueError):
+    """上傳的簡報超過限制或不是有效的 zip"""
+
+
+def limits_from_env():
+    """讀取環境變數覆寫預設限制（單位 MB 或個數）"""
+    limits = dict(DEFAULT_LIMITS)
+    for env, key, unit in (
+        ('PPT_MAX_UPLOAD_MB', 'max_compressed_bytes', MB),
+        ('PPT_MAX_UNCOMPRESSED_MB', 'max_uncompressed_bytes', MB),
+        ('PPT_MAX_PARTS', 'max_parts', 1),
+        ('PPT_MAX_MEDIA_PART_MB', 'max_media_part_bytes', MB),
+    ):
+        if os.environ.get(env):
+            limits[key] = int(os.environ[env]) * unit
+    return limits
+
+
+def read_chunked(fileobj, max_bytes, chunk_size=CHUNK_SIZE):
+    """分段讀取檔案物件並計算 SHA-256，超過 max_bytes 時立即丟出 IngestError
+
+    回傳 (內容 bytes, SHA-256)；檔案物件讀完後會回到開頭。
+    """
+    declared_size = getattr(fileobj, 'size', None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise IngestError(f"檔案大小 {declared_size / MB:.1f} MB 超過上限 {max_bytes / MB:.0f} MB")
+
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    buffer = io.BytesIO()
+    sha = hashlib.sha256()
+    total = 0
+    try:
+        for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+            total += len(chunk)
+            if total > max_bytes:
+                raise IngestError(f"檔案大小超過上限 {max_bytes / MB:.0f} MB")
+            sha.update(chunk)
+            buffer.write(chunk)
+    finally:
+        if hasattr(fileobj, 'seek'):
+            fileobj.seek(0)
+    return buffer.getvalue(), sha.hexdigest()
+
+
+def check_archive(data, limits=None):
+    """只讀取 zip 目錄檢查簡報結構，不解壓任何部件；回傳統計 dict，超過限制時丟出 IngestError
+
+    zipfile 解壓時不會超過目錄記錄的大小（超過會因 CRC 錯誤失敗），
+    因此以目錄中的大小檢查即可限制實際解壓出的資料量。
+    """
+    limits = limits or DEFAULT_LIMITS
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            infos = archive.infolist()
+    except zipfile.BadZipFile as e:
+        raise IngestError(f"不是有效的 .pptx（zip 格式錯誤）: {e}")
+
+    if len(infos) > limits['max_parts']:
+        raise IngestError(f"簡報包含 {len(infos)} 個部件，超過上限 {limits['max_parts']}")
+
+    uncompressed = 0
+    largest_media = 0
+    for info in infos:
+        uncompressed += info.file_size
+        if uncompressed > limits['max_uncompressed_bytes']:
+            raise IngestError(f"解壓後大小超過上限 {limits['max_uncompressed_bytes'] / MB:.0f} MB")
+        if info.filename.startswith('ppt/media/'):
+            largest_media = max(largest_media, info.file_size)
+            if info.file_size > limits['max_media_part_bytes']:
+                raise IngestError(
+                    f"媒體檔 {info.filename} 有 {info.file_size / MB:.1f} MB，"
+                    f"超過單一檔案上限 {limits['max_media_part_bytes'] / MB:.0f} MB"
+                )
+        # 小檔案的壓縮比本來就可能很高，只檢查解壓後超過 1 MB 的部件
+        if (info.file_size > MB and info.compress_size
+                and info.file_size / info.compress_size > limits['max_compression_ratio']):
+            raise IngestError(
+                f"{info.filename} 壓縮比 {info.file_size / info.compress_size:.0f} 倍異常，疑似 zip bomb"
+            )
+
+    return {
+        'parts': len(infos),
+        'uncompressed_bytes': uncompressed,
+        'largest_media_bytes': largest_media,
+    }
+
+
+def ingest_upload(fileobj, limits=None):
+    """接收上傳的簡報：分段讀取並檢查，回傳 {'data', 'digest', 'size', 'parts', ...}"""
+    limits = limits or DEFAULT_LIMITS
+    data, digest = read_chunked(fileobj, limits['max_compressed_bytes'])
+    summary = check_archive(data, limits)
+    summary.update({'data': data, 'digest': digest, 'size': len(data)})
+    return summary
@@ -0,0 +1,247 @@
+"""背景轉換工作佇列
+
+Streamlit 的腳本執行緒只負責送出工作與查詢狀態，實際轉換在背景執行緒中交給
+process_ppt 的行程池執行；同時執行的工作數與排隊數都有上限，佇列滿時拒絕新工作。
+"""
+import itertools
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from process_ppt import convert_templates_parallel
+from profiling import profile_conversion
+from result_cache import ResultCache, hash_bytes
+
+# 工作狀態：排隊中、執行中、完成、失敗、已取消
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+
+class QueueFullError(RuntimeError):
+    """排隊的工作已達上限，呼叫端應稍後再試"""
+
+
+class JobManager:
+    """轉換工作管理：工作編號、有上限的背景執行緒、佇列深度限制與狀態查詢
+
+    每個工作是一份簡報套用多個模板；有 result_cache 時先查快取，轉換完成後寫回快取。
+    有 slide_store（slide_store.SlideStore）時為增量轉換，重新上傳的簡報只重新產生有變更的投影片。
+    輸入達到 low_memory_threshold 位元組的簡報以低記憶體模式轉換（圖片不讀入記憶體，見 process_ppt.create_from_template）。
+    已結束的工作保留 retention 秒供查詢，取回結果後可呼叫 forget() 立即釋放。
+    """
+
+    def __init__(self, max_running=2, max_queued=8, max_workers=None, result_cache=None, retention=3600,
+                 slide_store=None, low_memory_threshold=None):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_workers = max_workers
+        self.result_cache = result_cache
+        self.slide_store = slide_store
+        self.low_memory_threshold = low_memory_threshold
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix='ppt-job')
+        self._jobs = OrderedDict()
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    def submit(self, input_data, template_paths, preview_slides=None, input_digest=None, profile=False):
+        """送出工作並回傳工作編號；排隊數已達上限時丟出 QueueFullError
+
+        已經算過輸入內容的 SHA-256 時可由 input_digest 傳入，省去重算。
+        profile 為 True 時不使用快取，在背景執行緒中逐一以分析器轉換，每個結果另附 'profile' 報告。
+        """
+        with self._lock:
+            self._purge_expired()
+            queued = sum(1 for job in self._jobs.values() if job['state'] == 'queued')
+            if queued >= self.max_queued:
+                raise QueueFullError(f"目前已有 {queued} 個工作在排隊，請稍後再試")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'sequence': next(self._sequence),
+                'state': 'queued',
+                'templates': [str(path) for path in template_paths],
+                'preview_slides': preview_slides,
+                'profile': profile,
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+                'progress': {},
+                'message': '',
+                'results': [],
+                'error': None
+            }
+            self._futures[job_id] = self._executor.submit(self._run, job_id, input_data, input_digest)
+        return job_id
+
+    def status(self, job_id):
+        """查詢工作狀態，回傳快照 dict；找不到時回傳 None
+
+        'position' 為排隊中的順位（1 表示下一個執行），'progress' 為 0 到 1 的整體進度。
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+            snapshot['results'] = list(job['results'])
+            templates = len(job['templates']) or 1
+            snapshot['progress'] = min(sum(job['progress'].values()) / templates, 1.0)
+            snapshot['position'] = None
+            if job['state'] == 'queued':
+                snapshot['position'] = 1 + sum(
+                    1 for other in self._jobs.values()
+                    if other['state'] == 'queued' and other['sequence'] < job['sequence']
+                )
+            return snapshot
+
+    def cancel(self, job_id):
+        """取消尚未開始的工作，成功時回傳 True"""
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None or not future.cancel():
+                return False
+            job = self._jobs[job_id]
+            job['state'] = 'cancelled'
+            job['finished'] = time.time()
+            del self._futures[job_id]
+            return True
+
+    def forget(self, job_id):
+        """移除已結束的工作與其結果"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job['state'] in FINISHED_STATES:
+                del self._jobs[job_id]
+                self._futures.pop(job_id, None)
+
+    def stats(self):
+        """回傳各狀態的工作數"""
+        with self._lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                counts[job['state']] += 1
+            return counts
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['state'] in FINISHED_STATES and now - job['finished'] > self.retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, input_data, input_digest=None):
+        """在背景執行緒中執行工作：先取快取，其餘模板交給行程池平行轉換"""
+        self._update(job_id, state='running', started=time.time(), message='準備轉換')
+        job = self._jobs[job_id]
+        if job['profile']:
+            self._run_profiled(job_id, input_data)
+            return
+        try:
+            variant = f"preview{job['preview_slides']}" if job['preview_slides'] is not None else None
+            if input_digest is None and self.result_cache is not None:
+                input_digest = hash_bytes(input_data)
+            cache_keys = {}
+            pending = []
+            for template_path in job['templates']:
+                if self.result_cache is not None:
+                    cache_keys[template_path] = ResultCache.make_key(input_digest, template_path, variant)
+                    cached_data = self.result_cache.get(cache_keys[template_path])
+                    if cached_data is not None:
+                        self._add_result(job_id, {
+                            'template_path': template_path,
+                            'data': cached_data,
+                            'slide_count': None,
+                            'elapsed': 0.0,
+                            'error': None,
+                            'traceback': None,
+                            'cached': True
+                        })
+                        continue
+                pending.append((template_path, None))
+
+            def on_progress(event):
+                # 每張投影片的最後一個階段：重新產生時是 copy_images，沿用上次結果時是 reuse
+                if event['phase'] not in ('copy_images', 'reuse'):
+                    return
+                with self._lock:
+                    job['progress'][event['template_path']] = (event['slide_index'] + 1) / event['total_slides']
+                    job['message'] = f"第 {event['slide_index'] + 1}/{event['total_slides']} 張"
+
+            results = convert_templates_parallel(
+                input_data, pending, max_workers=self.max_workers,
+                progress_callback=on_progress, preview_slides=job['preview_slides'],
+                slide_store=self.slide_store,
+                low_memory=self.low_memory_threshold is not None and len(input_data) >= self.low_memory_threshold
+            ) if pending else []
+            for result in results:
+                result['cached'] = False
+                if not result['error'] and self.result_cache is not None:
+                    self.result_cache.put(cache_keys[result['template_path']], result['data'])
+                self._add_result(job_id, result)
+
+            state = 'done' if any(not result['error'] for result in job['results']) else 'failed'
+            self._update(job_id, state=state, finished=time.time(), message='')
+        except Exception as e:
+            self._update(job_id, state='failed', finished=time.time(), error=str(e), message='')
+
+    def _run_profiled(self, job_id, input_data):
+        """分析模式：cProfile 只能記錄目前執行緒，因此直接在這個執行緒中逐一轉換"""
+        job = self._jobs[job_id]
+        try:
+            for template_path in job['templates']:
+                def on_progress(event, template_path=template_path):
+                    if event['phase'] != 'copy_images':
+                        return
+                    with self._lock:
+                        job['progress'][template_path] = (event['slide_index'] + 1) / event['total_slides']
+                        job['message'] = f"分析中：第 {event['slide_index'] + 1}/{event['total_slides']} 張"
+
+                result = {
+                    'template_path': template_path,
+                    'data': None,
+                    'slide_count': 0,
+                    'elapsed': 0.0,
+                    'error': None,
+                    'traceback': None,
+                    'cached': False,
+                    'profile': None
+                }
+                try:
+                    report = profile_conversion(
+                        input_data, template_path, progress_callback=on_progress,
+                        preview_slides=job['preview_slides']
+                    )
+                    result['data'] = report.pop('data')
+                    result['slide_count'] = report['slide_count']
+                    result['elapsed'] = report['elapsed']
+                    result['profile'] = report
+                except Exception as e:
+                    result['error'] = str(e)
+                    result['traceback'] = traceback.format_exc()
+                self._add_result(job_id, result)
+
+            state = 'done' if any(not result['error'] for result in job['results']) else 'failed'
+            self._update(job_id, state=state, finished=time.time(), message='')
+        except Exception as e:
+            self._update(job_id, state='failed', finished=time.time(), error=str(e), message='')
+
+    def _add_result(self, job_id, result):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['results'].append(result)
+            job['progress'][result['template_path']] = 1.0
@@ -0,0 +1,417 @@
+"""網頁應用的多人同時使用負載測試
+
+模擬 N 個同時上傳合成簡報並按下「開始魔法轉換」的使用者，在不同併發數下量測
+每個工作階段的延遲（p50/p95/p99）、吞吐量、整個行程樹的峰值 RSS 與失敗率，作為規劃主機規格的依據。
+
+    python loadtest.py                              # 併發 1, 2, 4, 8，每位使用者轉換 2 次
+    python loadtest.py --concurrency 1,4,16 --iterations 3 --deck 40:4:2:512
+    python loadtest.py --output loadtest.json       # 另存完整結果
+
+Streamlit 的 AppTest 無法操作 file_uploader，因此以行程內的驅動程式依 app.py 的順序呼叫同一組後端：
+分段接收與檢查上傳（ingest）、預掃描、送進共用的 JobManager、每 --poll 秒查詢一次狀態，
+完成後寫入 OutputStore 並讀回（下載）。延遲百分位數只計成功的工作；佇列已滿被拒絕的工作計為失敗，
+與網頁上「伺服器忙碌中」相同。
+安裝 Streamlit 時可加上 --app-reruns 以 AppTest 量測單次腳本重新執行的耗時（輪詢進度時每位使用者每 --poll 秒一次）。
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from pathlib import Path
+
+import process_ppt
+from benchmark import generate_deck, parse_case
+from ingest import IngestError, ingest_upload, limits_from_env
+from job_queue import FINISHED_STATES, JobManager, QueueFullError
+from output_store import OutputStore
+from prescan import check_limits, prescan_deck
+from result_cache import ResultCache
+from slide_store import SlideStore
+from template_store import build_templates, find_templates
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = Path(__file__).parent.absolute().parent
+DEFAULT_TEMPLATE_DIR = PROJECT_ROOT / 'ppt' / 'template'
+APP_PATH = Path(__file__).parent.absolute() / 'app.py'
+
+# 預設的合成簡報：(投影片數, 每張文字框數, 每張圖片數, 圖片邊長 px)
+DEFAULT_DECK = (20, 4, 1, 512)
+DEFAULT_CONCURRENCY = (1, 2, 4, 8)
+
+# 記錄 RSS 的取樣間隔（秒）
+RSS_SAMPLE_INTERVAL = 0.2
+
+
+def _process_tree_rss():
+    """目前行程與所有子孫行程（轉換行程池）的 RSS 總和；無法從 /proc 讀取時回傳 None"""
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                # 行程名稱可能包含空白，父行程編號在最後一個 ')' 之後的第二欄
+                fields = f.read().rsplit(b')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(name))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    total = 0
+    pending = [os.getpid()]
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/status', encoding='ascii', errors='replace') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+def _max_rss_fallback():
+    """沒有 /proc 時，以本行程與已結束子行程的最大 RSS 近似"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux 單位為 KB，macOS 為 bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RssSampler:
+    """在背景執行緒中定期取樣行程樹的 RSS，記錄期間的最大值"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = _process_tree_rss() or 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        if not self.peak:
+            self.peak = _max_rss_fallback() or 0
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = _process_tree_rss()
+            if rss is None:
+                return
+            self.peak = max(self.peak, rss)
+
+
+def percentile(values, q):
+    """最近排名法的百分位數（q 為 0 到 100）；沒有資料時回傳 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(-(-q * len(ordered) // 100)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def tag_deck(data, tag):
+    """在 zip 註解中加入標記：投影片內容不變，但每份上傳的 SHA-256 不同，不會命中結果快取"""
+    buffer = io.BytesIO(data)
+    with zipfile.ZipFile(buffer, 'a') as archive:
+        archive.comment = tag.encode('utf-8')
+    return buffer.getvalue()
+
+
+class LoadTestApp:
+    """與 app.py 相同設定的後端元件（結果快取、投影片快取、工作佇列、輸出暫存）"""
+
+    def __init__(self, template_paths, max_running=2, max_queued=8, max_workers=None, incremental=False,
+                 poll_interval=0.5, work_dir=None):
+        self.template_paths = template_paths
+        self.poll_interval = poll_interval
+        self.upload_limits = limits_from_env()
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='ppt-loadtest-')
+        self.result_cache = ResultCache()
+        self.slide_store = SlideStore(os.path.join(self.work_dir, 'slides')) if incremental else None
+        self.output_store = OutputStore(directory=os.path.join(self.work_dir, 'outputs'))
+        self.job_manager = JobManager(
+            max_running=max_running,
+            max_queued=max_queued,
+            max_workers=max_workers,
+            result_cache=self.result_cache,
+            slide_store=self.slide_store
+        )
+
+    def close(self):
+        self.job_manager.shutdown()
+
+    def run_session(self, name, data):
+        """依網頁上的順序完成一次「上傳 → 轉換 → 下載」，回傳量測結果 dict
+
+        'status' 為 'ok'、'rejected'（佇列已滿）或 'failed'。
+        """
+        session_id = uuid.uuid4().hex
+        started = time.perf_counter()
+        record = {'status': 'ok', 'error': None, 'queue_wait': None, 'slides': 0}
+
+        try:
+            uploaded_file = io.BytesIO(data)
+            uploaded_file.name = name
+            uploaded_file.size = len(data)
+            ingested = ingest_upload(uploaded_file, self.upload_limits)
+            problems = check_limits(prescan_deck(ingested['data']))
+            if problems:
+                raise IngestError('；'.join(problems))
+            # 按下轉換按鈕時 app.py 會再讀一次上傳檔
+            ingested = ingest_upload(uploaded_file, self.upload_limits)
+            job_id = self.job_manager.submit(ingested['data'], self.template_paths, input_digest=ingested['digest'])
+        except QueueFullError as e:
+            record.update(status='rejected', error=str(e))
+            record['latency'] = time.perf_counter() - started
+            return record
+        except Exception as e:
+            record.update(status='failed', error=str(e))
+            record['latency'] = time.perf_counter() - started
+            return record
+
+        # 頁面每 poll_interval 秒重新執行一次，查詢工作狀態
+        while True:
+            time.sleep(self.poll_interval)
+            status = self.job_manager.status(job_id)
+            if status is None or status['state'] in FINISHED_STATES:
+                break
+        self.job_manager.forget(job_id)
+
+        if status is None or status['state'] != 'done' or status['error']:
+            record.update(status='failed', error=(status or {}).get('error') or '工作已失效')
+        else:
+            record['queue_wait'] = status['started'] - status['created']
+            tokens = []
+            try:
+                for result in status['results']:
+                    if result['error']:
+                        raise RuntimeError(result['error'])
+                    record['slides'] += result['slide_count']
+                    tokens.append(self.output_store.put(session_id, f"{result['template_path']}.pptx", result['data']))
+                for token in tokens:
+                    with self.output_store.open(token) as f:
+                        f.read()
+            except Exception as e:
+                record.update(status='failed', error=str(e))
+            finally:
+                self.output_store.discard_session(session_id)
+        record['latency'] = time.perf_counter() - started
+        return record
+
+
+def run_level(app, deck_data, concurrency, iterations, shared_deck=False):
+    """以 concurrency 位同時開始的使用者各轉換 iterations 次，回傳彙總 dict"""
+    records = []
+    records_lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def user(user_index):
+        barrier.wait()
+        for iteration in range(iterations):
+            data = deck_data if shared_deck else tag_deck(deck_data, f"loadtest {concurrency}-{user_index}-{iteration}")
+            record = app.run_session(f"loadtest_{user_index}.pptx", data)
+            with records_lock:
+                records.append(record)
+
+    threads = [threading.Thread(target=user, args=(i,), name=f'loadtest-user-{i}') for i in range(concurrency)]
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    ok = [record for record in records if record['status'] == 'ok']
+    latencies = [record['latency'] for record in ok]
+    queue_waits = [record['queue_wait'] for record in ok]
+    errors = {}
+    for record in records:
+        if record['error']:
+            errors[record['error']] = errors.get(record['error'], 0) + 1
+    return {
+        'concurrency': concurrency,
+        'sessions': len(records),
+        'ok': len(ok),
+        'rejected': sum(1 for record in records if record['status'] == 'rejected'),
+        'failed': sum(1 for record in records if record['status'] == 'failed'),
+        'failure_rate': (len(records) - len(ok)) / len(records) if records else 0.0,
+        'wall': wall,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'queue_wait_p50': percentile(queue_waits, 50),
+        'decks_per_minute': len(ok) / wall * 60 if wall else 0.0,
+        'slides_per_second': sum(record['slides'] for record in ok) / wall if wall else 0.0,
+        'peak_rss': sampler.peak,
+        'errors': errors
+    }
+
+
+def measure_app_reruns(reruns):
+    """以 Streamlit AppTest 量測 app.py 單次重新執行的耗時（秒）；未安裝 Streamlit 時回傳 None"""
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return None
+    app_test = AppTest.from_file(str(APP_PATH), default_timeout=120)
+    # 第一次執行包含 import 與 cache_resource 的初始化，不計入
+    app_test.run()
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app_test.run()
+        timings.append(time.perf_counter() - started)
+    return {
+        'reruns': reruns,
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'exceptions': [str(exception.value) for exception in app_test.exception]
+    }
+
+
+def format_level(result):
+    def ms(value):
+        return f"{value * 1000:8.0f}" if value is not None else f"{'-':>8}"
+
+    return (
+        f"{result['concurrency']:>4} {result['sessions']:>6} {result['ok']:>6} {result['rejected']:>6} {result['failed']:>6}"
+        f" {ms(result['p50'])} {ms(result['p95'])} {ms(result['p99'])} {ms(result['queue_wait_p50'])}"
+        f" {result['decks_per_minute']:10.1f} {result['slides_per_second']:10.1f}"
+        f" {result['peak_rss'] / 1024 / 1024:9.0f} {result['failure_rate'] * 100:7.1f}%"
+    )
+
+
+def parse_levels(text):
+    try:
+        levels = [int(v) for v in text.split(',') if v.strip()]
+    except ValueError:
+        levels = []
+    if not levels or min(levels) < 1:
+        raise argparse.ArgumentTypeError("併發數格式為以逗號分隔的正整數，例如 1,2,4,8")
+    return levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="網頁應用的多人同時使用負載測試")
+    parser.add_argument('--concurrency', type=parse_levels, default=list(DEFAULT_CONCURRENCY),
+                        help="要測試的併發使用者數，以逗號分隔（預設 1,2,4,8）")
+    parser.add_argument('--iterations', type=int, default=2, help="每位使用者連續轉換的次數")
+    parser.add_argument('--deck', type=parse_case, default=DEFAULT_DECK,
+                        help="合成簡報 投影片:文字框:圖片:圖片邊長（預設 20:4:1:512）")
+    parser.add_argument('--template-dir', default=str(DEFAULT_TEMPLATE_DIR), help="模板資料夾")
+    parser.add_argument('--max-running', type=int, default=int(os.environ.get('PPT_MAX_RUNNING_JOBS', '2')),
+                        help="同時執行的工作數（預設同 PPT_MAX_RUNNING_JOBS）")
+    parser.add_argument('--max-queued', type=int, default=int(os.environ.get('PPT_MAX_QUEUED_JOBS', '8')),
+                        help="最多排隊數（預設同 PPT_MAX_QUEUED_JOBS）")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('PPT_MAX_WORKERS', '0')) or None,
+                        help="轉換行程數（預設同 PPT_MAX_WORKERS）")
+    parser.add_argument('--poll', type=float, default=0.5, help="查詢工作狀態的間隔秒數（同網頁）")
+    parser.add_argument('--shared-deck', action='store_true', help="所有使用者上傳完全相同的檔案（量測結果快取命中）")
+    parser.add_argument('--incremental', action='store_true',
+                        help="啟用投影片快取；各使用者的投影片內容相同，第一次之後都會沿用（量測重新上傳）")
+    parser.add_argument('--app-reruns', type=int, default=0, help="另以 AppTest 量測 app.py 重新執行 N 次的耗時")
+    parser.add_argument('--output', help="將結果寫入此 JSON 檔")
+    args = parser.parse_args(argv)
+
+    logging.getLogger(process_ppt.__name__).setLevel(logging.ERROR)
+    template_paths = [str(path) for path in find_templates(args.template_dir)]
+    if not template_paths:
+        print(f"❌ 模板資料夾中沒有 .pptx: {args.template_dir}", file=sys.stderr)
+        return 2
+    build_templates(args.template_dir)
+
+    with tempfile.TemporaryDirectory(prefix='ppt-loadtest-') as work_dir:
+        deck_path = os.path.join(work_dir, 'deck.pptx')
+        generate_deck(deck_path, *args.deck)
+        with open(deck_path, 'rb') as f:
+            deck_data = f.read()
+
+        app = LoadTestApp(
+            template_paths,
+            max_running=args.max_running,
+            max_queued=args.max_queued,
+            max_workers=args.workers,
+            incremental=args.incremental,
+            poll_interval=args.poll,
+            work_dir=work_dir
+        )
+        print(f"📂 合成簡報 {args.deck[0]} 張（{len(deck_data) / 1024:.0f} KB）× {len(template_paths)} 個模板，"
+              f"同時執行 {args.max_running} 個工作、排隊上限 {args.max_queued}")
+        try:
+            # 暖機：啟動轉換行程池並載入模板，不計入任何併發數的結果
+            app.run_session('warmup.pptx', tag_deck(deck_data, 'loadtest warmup'))
+            print(f"\n{'併發':>4} {'工作':>6} {'成功':>6} {'拒絕':>6} {'失敗':>6} {'p50 ms':>8} {'p95 ms':>8}"
+                  f" {'p99 ms':>8} {'排隊 ms':>8} {'份/分鐘':>10} {'張/秒':>10} {'RSS MB':>9} {'失敗率':>8}")
+            levels = []
+            for concurrency in args.concurrency:
+                result = run_level(app, deck_data, concurrency, max(args.iterations, 1), args.shared_deck)
+                levels.append(result)
+                print(format_level(result), flush=True)
+        finally:
+            app.close()
+
+    for result in levels:
+        for error, count in result['errors'].items():
+            print(f"  併發 {result['concurrency']}: {count} × {error}")
+
+    app_reruns = None
+    if args.app_reruns:
+        app_reruns = measure_app_reruns(args.app_reruns)
+        if app_reruns is None:
+            print("\n⚠️ 未安裝 Streamlit，略過 AppTest 量測")
+        else:
+            print(f"\napp.py 重新執行: p50 {app_reruns['p50'] * 1000:.0f} ms，p95 {app_reruns['p95'] * 1000:.0f} ms"
+                  f"（每位等待中的使用者每 {args.poll} 秒一次）")
+
+    if args.output:
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'engine_version': process_ppt.ENGINE_VERSION,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'deck': list(args.deck),
+            'templates': [Path(path).name for path in template_paths],
+            'max_running': args.max_running,
+            'max_queued': args.max_queued,
+            'workers': args.workers,
+            'iterations': args.iterations,
+            'shared_deck': args.shared_deck,
+            'incremental': args.incremental,
+            'levels': levels,
+            'app_reruns': app_reruns
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n已寫入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""轉換輸出的磁碟暫存
+
+輸出簡報寫入本機資料夾，session state 只保留檔名、大小與存取代碼；
+每個工作階段與整體都有容量上限，超過時以 LRU 淘汰，太久沒被存取的檔案依 TTL 刪除。
+"""
+import mmap
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class OutputStore:
+    """以代碼存取的輸出檔案庫，下載時直接從磁碟讀取或記憶體映射，不常駐記憶體"""
+
+    def __init__(self, directory=None, ttl=3600, session_quota=256 * 1024 * 1024,
+                 total_quota=4 * 1024 * 1024 * 1024):
+        self.directory = directory or tempfile.mkdtemp(prefix='ppt-outputs-')
+        self.ttl = ttl
+        self.session_quota = session_quota
+        self.total_quota = total_quota
+        # 代碼 -> {'session', 'name', 'path', 'size', 'created', 'accessed'}，依存取時間排列
+        self._entries = OrderedDict()
+        self._session_bytes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        # 重新啟動後舊的工作階段已不存在，上次留下的輸出一律清除
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.endswith(('.pptx', '.tmp')):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def put(self, session_id, name, data):
+        """存入一個輸出檔案並回傳代碼；超過容量時先淘汰同一工作階段最久未使用的檔案"""
+        size = len(data)
+        if size > self.session_quota or size > self.total_quota:
+            raise ValueError(f"檔案大小 {size / 1024 / 1024:.1f} MB 超過暫存上限")
+        token = uuid.uuid4().hex
+        path = os.path.join(self.directory, f"{token}.pptx")
+        # 先寫入暫存檔再改名，避免下載到寫一半的檔案
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            self._entries[token] = {
+                'session': session_id,
+                'name': name,
+                'path': path,
+                'size': size,
+                'created': now,
+                'accessed': now
+            }
+            self._session_bytes[session_id] = self._session_bytes.get(session_id, 0) + size
+            self._total_bytes += size
+            while self._session_bytes[session_id] > self.session_quota:
+                self._remove(next(t for t, e in self._entries.items() if e['session'] == session_id))
+            while self._total_bytes > self.total_quota:
+                self._remove(next(iter(self._entries)))
+        return token
+
+    def contains(self, token):
+        """檔案仍在（未過期也未被淘汰）時回傳 True"""
+        with self._lock:
+            self._evict_expired(time.time())
+            return token in self._entries
+
+    def info(self, token):
+        """回傳檔案的 metadata，找不到時丟出 KeyError"""
+        with self._lock:
+            return dict(self._touch(token))
+
+    def open(self, token):
+        """以唯讀檔案物件開啟輸出，讓下載直接從磁碟串流"""
+        with self._lock:
+            path = self._touch(token)['path']
+        return open(path, 'rb')
+
+    def map(self, token):
+        """以記憶體映射開啟輸出，回傳 mmap（呼叫端負責 close）"""
+        with self.open(token) as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def discard(self, token):
+        """刪除單一輸出"""
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+
+    def discard_session(self, session_id):
+        """刪除某個工作階段的所有輸出"""
+        with self._lock:
+            for token in [t for t, e in self._entries.items() if e['session'] == session_id]:
+                self._remove(token)
+
+    def evict_expired(self):
+        """刪除超過 TTL 未被存取的輸出，回傳刪除數"""
+        with self._lock:
+            return self._evict_expired(time.time())
+
+    def stats(self):
+        """回傳目前的檔案數與用量"""
+        with self._lock:
+            return {
+                'files': len(self._entries),
+                'bytes': self._total_bytes,
+                'sessions': len(self._session_bytes)
+            }
+
+    def _touch(self, token):
+        self._evict_expired(time.time())
+        entry = self._entries[token]
+        entry['accessed'] = time.time()
+        self._entries.move_to_end(token)
+        return entry
+
+    def _evict_expired(self, now):
+        expired = [t for t, e in self._entries.items() if now - e['accessed'] > self.ttl]
+        for token in expired:
+            self._remove(token)
+        return len(expired)
+
+    def _remove(self, token):
+        entry = self._entries.pop(token)
+        session_id = entry['session']
+        self._total_bytes -= entry['size']
+        self._session_bytes[session_id] -= entry['size']
+        try:
+            os.remove(entry['path'])
+        except OSError:
+            pass
+        if self._session_bytes[session_id] <= 0:
+            del self._session_bytes[session_id]
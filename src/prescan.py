@@ -0,0 +1,155 @@
+"""上傳簡報的快速預掃描
+
+直接讀取 .pptx 的 zip 目錄，只以 iterparse 解析 presentation.xml 與各投影片 XML，
+不建立 Presentation、不載入圖片，用來在轉換前顯示簡報概況並擋下過大或損毀的檔案。
+"""
+import io
+import posixpath
+import time
+import zipfile
+
+from lxml import etree
+
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+PRESENTATION_PART = 'ppt/presentation.xml'
+PRESENTATION_RELS = 'ppt/_rels/presentation.xml.rels'
+
+
+class PrescanError(ValueError):
+    """簡報無法預掃描（不是 zip、缺少必要部件或 XML 損毀）"""
+
+
+def _iterparse(data, tags):
+    # 不展開實體、不讀取外部資源，避免惡意 XML
+    return etree.iterparse(
+        io.BytesIO(data), events=('end',), tag=tags,
+        resolve_entities=False, no_network=True, huge_tree=False
+    )
+
+
+def _release(element):
+    """處理完的元素連同前面的兄弟節點一起釋放，讓記憶體維持固定"""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def _slide_partnames(archive):
+    """依 sldIdLst 的順序回傳投影片部件在 zip 中的名稱"""
+    targets = {}
+    for _, rel in _iterparse(archive.read(PRESENTATION_RELS), _REL + 'Relationship'):
+        targets[rel.get('Id')] = rel.get('Target')
+        _release(rel)
+
+    partnames = []
+    for _, sld_id in _iterparse(archive.read(PRESENTATION_PART), _P + 'sldId'):
+        target = targets.get(sld_id.get(_R + 'id'))
+        _release(sld_id)
+        if target is None:
+            raise PrescanError("presentation.xml 參照了不存在的投影片關聯")
+        if target.startswith('/'):
+            partnames.append(target.lstrip('/'))
+        else:
+            partnames.append(posixpath.normpath(posixpath.join('ppt', target)))
+    return partnames
+
+
+def _shape_text(sp):
+    """與 python-pptx 相同：段落之間以換行分隔"""
+    return '\n'.join(
+        ''.join(t.text or '' for t in paragraph.iter(_A + 't'))
+        for paragraph in sp.iter(_A + 'p')
+    )
+
+
+def _scan_slide(data):
+    """掃描單張投影片最上層的形狀：標題、有文字的形狀數與圖片數"""
+    slide = {'title': '', 'text_blocks': 0, 'pictures': 0}
+    has_title = False
+    for _, element in _iterparse(data, (_P + 'sp', _P + 'pic')):
+        parent = element.getparent()
+        # 群組內的形狀不計入，與轉換引擎只處理最上層形狀一致
+        if parent is None or parent.tag != _P + 'spTree':
+            continue
+        if element.tag == _P + 'pic':
+            slide['pictures'] += 1
+        else:
+            text = _shape_text(element)
+            if text.strip():
+                slide['text_blocks'] += 1
+            ph = element.find(f'{_P}nvSpPr/{_P}nvPr/{_P}ph')
+            # idx 為 0（未指定即為 0）的佔位符就是標題，與 slide.shapes.title 相同
+            if not has_title and ph is not None and ph.get('idx', '0') == '0':
+                has_title = True
+                slide['title'] = text
+        _release(element)
+    return slide
+
+
+def prescan_deck(input_file):
+    """快速掃描簡報，回傳投影片數、各投影片標題、文字區塊與圖片數，以及媒體檔總大小
+
+    input_file 可以是路徑、檔案物件或 bytes；檔案物件使用後會回到開頭。
+    """
+    started = time.perf_counter()
+    if isinstance(input_file, (bytes, bytearray, memoryview)):
+        input_file = io.BytesIO(input_file)
+    try:
+        with zipfile.ZipFile(input_file) as archive:
+            infos = archive.infolist()
+            names = {info.filename for info in infos}
+            for required in (PRESENTATION_PART, PRESENTATION_RELS):
+                if required not in names:
+                    raise PrescanError(f"不是有效的 .pptx：缺少 {required}")
+
+            slides = []
+            for index, partname in enumerate(_slide_partnames(archive)):
+                if partname not in names:
+                    raise PrescanError(f"不是有效的 .pptx：缺少 {partname}")
+                slide = _scan_slide(archive.read(partname))
+                slide['index'] = index
+                slides.append(slide)
+
+            media = [info for info in infos if info.filename.startswith('ppt/media/')]
+            scan = {
+                'slide_count': len(slides),
+                'slides': slides,
+                'text_blocks': sum(slide['text_blocks'] for slide in slides),
+                'pictures': sum(slide['pictures'] for slide in slides),
+                'media_count': len(media),
+                'media_bytes': sum(info.file_size for info in media),
+                'uncompressed_bytes': sum(info.file_size for info in infos),
+            }
+    except zipfile.BadZipFile as e:
+        raise PrescanError(f"不是有效的 .pptx（zip 格式錯誤）: {e}")
+    except etree.XMLSyntaxError as e:
+        raise PrescanError(f"簡報 XML 損毀: {e}")
+    except (RuntimeError, NotImplementedError) as e:
+        # 加密或使用不支援的壓縮方式
+        raise PrescanError(f"無法讀取簡報內容: {e}")
+    finally:
+        if hasattr(input_file, 'seek'):
+            input_file.seek(0)
+    scan['elapsed'] = time.perf_counter() - started
+    return scan
+
+
+def check_limits(scan, max_slides=None, max_media_bytes=None):
+    """檢查掃描結果是否超過限制，回傳錯誤訊息列表（空列表表示通過）"""
+    problems = []
+    if scan['slide_count'] == 0:
+        problems.append("簡報中沒有任何投影片")
+    if max_slides and scan['slide_count'] > max_slides:
+        problems.append(f"投影片數 {scan['slide_count']} 超過上限 {max_slides}")
+    if max_media_bytes and scan['media_bytes'] > max_media_bytes:
+        problems.append(
+            f"圖片與媒體共 {scan['media_bytes'] / 1024 / 1024:.1f} MB，"
+            f"超過上限 {max_media_bytes / 1024 / 1024:.0f} MB"
+        )
+    return problems
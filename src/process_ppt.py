@@ -1,66 +1,156 @@
 from pptx import Presentation
-from pptx.util import Pt, Inches
+from pptx.util import Pt, Inches, lazyproperty
 from pptx.enum.shapes import PP_PLACEHOLDER, MSO_SHAPE_TYPE
 from pptx.enum.text import PP_ALIGN
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part, PartFactory, XmlPart, _PackageLoader, _Relationship
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.serialized import _ContentTypesItem
+from pptx.opc.oxml import serialize_part_xml
+from pptx.oxml import parse_xml
+from pptx.oxml.xmlchemy import OxmlElement
+from pptx.oxml.ns import qn
+from pptx.package import Package
+from pptx.parts.image import ImagePart
+from lxml import etree
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from copy import deepcopy
+import hashlib
 import io
+import json
+import logging
+import multiprocessing
 import os
+import queue
+import shutil
+import threading
+import time
+import traceback
+import zipfile
 
-def analyze_input_slide(slide, slide_index, total_slides):
-    """分析輸入投影片的內容結構"""
-    info = {
-        'slide_index': slide_index,
-        'is_first': slide_index == 0,
-        'is_last': slide_index == total_slides - 1,
-        'layout_name': slide.slide_layout.name,
-        'has_title': False,
-        'title_text': '',
+from slide_records import ImageRef, SlideInfo, TextBlock, dumps_slide_infos, loads_slide_infos
+
+logger = logging.getLogger(__name__)
+
+# 轉換過程回報的階段，依序為：讀取、分析、選擇模板、複製形狀、填入文字、複製圖片、儲存；
+# 增量轉換時未變更的投影片以 'reuse' 取代複製形狀到複製圖片這三個階段
+PHASES = ('load', 'analyze', 'select', 'copy_shapes', 'fill_text', 'copy_images', 'reuse', 'save')
+
+# 轉換引擎版本：輸出結果有變動時需更新，讓舊的結果快取失效
+ENGINE_VERSION = '1.3'
+
+# 已編譯模板快取的最大數量
+TEMPLATE_CACHE_SIZE = 8
+
+# 預先編譯的模板產物：副檔名與格式版本（產物內容有變動時需更新）
+TEMPLATE_ARTIFACT_SUFFIX = '.compiled'
+TEMPLATE_ARTIFACT_FORMAT = 2
+
+TITLE_PLACEHOLDER_TYPES = (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE)
+
+# 選擇模板投影片的成本權重：遺失文字最嚴重，文字塞不下次之，複製後又刪除的位置最輕
+LOST_TEXT_COST = 10
+OVERFLOW_COST = 3
+UNUSED_SLOT_COST = 1
+MISSING_PICTURE_SLOT_COST = 0.5
+# 以 14pt 的內容文字估計每平方英吋可容納的字數
+CHARS_PER_SQUARE_INCH = 20
+
+# 低記憶體模式逐段讀寫 zip 成員（計算雜湊、複製媒體檔）的區塊大小
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def index_slide_shapes(slide):
+    """單次走訪投影片的形狀並分類，供分析與清理共用
+
+    'title' 與 slide.shapes.title 相同（idx 為 0 的佔位符）；文字框依序放在 'text_shapes'，
+    並依類型分到 'title_placeholders'、'content_placeholders' 與 'text_boxes'；
+    'texts' 以形狀的 XML 元素為鍵保存文字，每個文字框只讀取一次。
+    """
+    index = {
+        'title': None,
         'placeholder_count': 0,
         'text_shapes': [],
-        'image_shapes': [],
-        'other_shapes': []
+        'title_placeholders': [],
+        'content_placeholders': [],
+        'text_boxes': [],
+        'pictures': [],
+        'texts': {}
     }
     
-    # 檢查標題
-    try:
-        if slide.shapes.title and slide.shapes.title.text:
-            info['has_title'] = True
-            info['title_text'] = slide.shapes.title.text
-    except:
-        pass
-    
-    # 分析所有形狀
     for shape in slide.shapes:
-        if shape.is_placeholder:
-            info['placeholder_count'] += 1
-        
-        if shape.has_text_frame and shape.text.strip():
-            info['text_shapes'].append({
-                'text': shape.text,
-                'left': shape.left,
-                'top': shape.top,
-                'width': shape.width,
-                'height': shape.height,
-                'is_title': (shape == slide.shapes.title if hasattr(slide.shapes, 'title') else False)
-            })
+        is_placeholder = shape.is_placeholder
+        is_title_placeholder = False
+        if is_placeholder:
+            index['placeholder_count'] += 1
+            try:
+                ph_format = shape.placeholder_format
+                if ph_format.idx == 0 and index['title'] is None:
+                    index['title'] = shape
+                is_title_placeholder = ph_format.type in TITLE_PLACEHOLDER_TYPES
+            except:
+                pass
         
-        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-            info['image_shapes'].append({
-                'left': shape.left,
-                'top': shape.top,
-                'width': shape.width,
-                'height': shape.height
-            })
+        if shape.has_text_frame:
+            index['text_shapes'].append(shape)
+            index['texts'][shape.element] = shape.text
+            if not is_placeholder:
+                index['text_boxes'].append(shape)
+            elif is_title_placeholder:
+                index['title_placeholders'].append(shape)
+            else:
+                index['content_placeholders'].append(shape)
+        # 圖片沒有文字框，有文字框的形狀不必再判斷類型
+        elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+            index['pictures'].append(shape)
+    
+    return index
+
+
+def analyze_input_slide(slide, slide_index, total_slides):
+    """分析輸入投影片的內容結構，回傳 SlideInfo"""
+    index = index_slide_shapes(slide)
+    texts = index['texts']
+    
+    # 檢查標題
+    title = index['title']
+    title_element = title.element if title is not None else None
+    title_text = texts[title_element] if title is not None and title.has_text_frame else ''
+    
+    # 文字與圖片都取自同一次走訪的結果
+    text_blocks = [
+        TextBlock(texts[shape.element], shape.left, shape.top, shape.width, shape.height,
+                  shape.element is title_element)
+        for shape in index['text_shapes']
+        if texts[shape.element].strip()
+    ]
+    images = [
+        ImageRef(shape.shape_id, shape.left, shape.top, shape.width, shape.height)
+        for shape in index['pictures']
+    ]
     
-    return info
+    return SlideInfo(
+        slide_index=slide_index,
+        is_first=slide_index == 0,
+        is_last=slide_index == total_slides - 1,
+        layout_name=slide.slide_layout.name,
+        has_title=bool(title_text),
+        title_text=title_text,
+        placeholder_count=index['placeholder_count'],
+        text_blocks=text_blocks,
+        images=images
+    )
 
 def select_template_slide(slide_info, template_slides):
-    """根據投影片內容選擇最適合的模板投影片"""
-    has_title = slide_info['has_title']
-    text_count = len([s for s in slide_info['text_shapes'] if not s['is_title']])
-    image_count = len(slide_info['image_shapes'])
-    is_first = slide_info['is_first']
-    is_last = slide_info['is_last']
+    """根據投影片內容選擇最適合的模板投影片
+
+    template_slides 為 CompiledSlide 時依各投影片的可填入位置（capabilities）計算配對成本，
+    只在成本最低的投影片之間輪流使用；沒有位置資訊時（例如直接傳入 python-pptx 的投影片）依序循環。
+    """
+    is_first = slide_info.is_first
+    is_last = slide_info.is_last
     total_template_slides = len(template_slides)
     
     # 最後一張：使用模板的最後一張
@@ -71,20 +161,108 @@ def select_template_slide(slide_info, template_slides):
     if is_first:
         return 0
     
-    # 根據內容數量循環使用模板投影片
-    # 模板有14張投影片（索引 0-13）
-    # 我們從第2張開始循環使用（跳過第1張標題頁和最後1張結束頁）
-    available_slides = list(range(1, total_template_slides - 1))  # [1, 2, 3, ..., 12]
+    # 從第2張開始使用（跳過第1張標題頁和最後1張結束頁）
+    available_slides = list(range(1, total_template_slides - 1))
+    
+    capabilities = [getattr(template_slides[i], 'capabilities', None) for i in available_slides]
+    if all(capabilities):
+        costs = [match_cost(slide_info, capability) for capability in capabilities]
+        best = min(costs)
+        available_slides = [i for i, cost in zip(available_slides, costs) if cost <= best]
+    
+    # 去掉第一張後的索引，在候選投影片之間循環使用
+    adjusted_index = slide_info.slide_index - 1
+    return available_slides[adjusted_index % len(available_slides)]
+
+
+def match_cost(slide_info, capabilities):
+    """輸入投影片套用到某張模板投影片的成本，越低越合適
+
+    沒有位置可放的標題與內容視為遺失；內容總字數超過內容區域估計的容量時依超出比例計算；
+    沒用到的文字位置在填入後會被刪除，每個計一次複製又刪除的成本。
+    """
+    contents = slide_info.content_texts
+    has_title = 1 if slide_info.has_title else 0
+    
+    lost = max(len(contents) - capabilities['content'], 0)
+    if has_title and capabilities['title'] == 0:
+        lost += 1
+    cost = LOST_TEXT_COST * lost
+    
+    chars = sum(len(text) for text in contents)
+    if chars:
+        capacity = capabilities['content_area'] * CHARS_PER_SQUARE_INCH
+        overflow = chars / capacity - 1 if capacity else 1
+        cost += OVERFLOW_COST * min(max(overflow, 0), 1)
     
-    # 根據投影片索引循環選擇
-    slide_index = slide_info['slide_index']
-    # 去掉第一張後的索引
-    adjusted_index = slide_index - 1
+    unused = max(capabilities['content'] - len(contents), 0) + max(capabilities['title'] - has_title, 0)
+    cost += UNUSED_SLOT_COST * unused
     
-    # 循環使用可用的模板投影片
-    selected_index = available_slides[adjusted_index % len(available_slides)]
+    cost += MISSING_PICTURE_SLOT_COST * max(len(slide_info.images) - capabilities['picture'], 0)
+    return cost
+
+
+def classify_text_shapes(index):
+    """將投影片的文字形狀分為標題與內容位置（依位置排序），填入文字與建立位置索引共用
+
+    佔位符依類型區分；非佔位符的文字框若文字較短且位置靠上視為標題，其餘（含空白文字框）視為內容。
+    """
+    texts = index['texts']
+    title_placeholders = {shape.element for shape in index['title_placeholders']}
+    title_shapes = []
+    content_shapes = []
+    
+    for shape in index['text_shapes']:
+        if shape.is_placeholder:
+            if shape.element in title_placeholders:
+                title_shapes.append(shape)
+            else:
+                content_shapes.append(shape)
+        else:
+            # 非佔位符的文字框
+            # 根據文字內容判斷是標題還是內容
+            text = texts[shape.element]
+            if text.strip() != '':
+                # 如果文字較短且位置靠上，視為標題候選
+                if len(text) < 100 and shape.top < Inches(2):
+                    title_shapes.append(shape)
+                else:
+                    content_shapes.append(shape)
+            else:
+                content_shapes.append(shape)
     
-    return selected_index
+    # 按位置排序
+    title_shapes.sort(key=lambda x: (x.top, x.left))
+    content_shapes.sort(key=lambda x: (x.top, x.left))
+    return title_shapes, content_shapes
+
+
+def _area_square_inches(shapes):
+    return sum((shape.width or 0) * (shape.height or 0) for shape in shapes) / Inches(1) ** 2
+
+
+def slide_capabilities(slide):
+    """統計投影片上可填入的位置：標題、內容與圖片佔位符的數量與面積（平方英吋）
+
+    slide 應為已套上佈局佔位符與模板形狀的投影片，與轉換時 fill_slide_text 看到的形狀相同；
+    圖片佔位符也會被填入文字，因此同時計入內容位置。
+    """
+    title_shapes, content_shapes = classify_text_shapes(index_slide_shapes(slide))
+    picture_shapes = []
+    for shape in content_shapes:
+        try:
+            if shape.is_placeholder and shape.placeholder_format.type == PP_PLACEHOLDER.PICTURE:
+                picture_shapes.append(shape)
+        except:
+            pass
+    return {
+        'title': len(title_shapes),
+        'content': len(content_shapes),
+        'picture': len(picture_shapes),
+        'title_area': round(_area_square_inches(title_shapes), 3),
+        'content_area': round(_area_square_inches(content_shapes), 3),
+        'picture_area': round(_area_square_inches(picture_shapes), 3)
+    }
 
 def get_template_placeholders(slide):
     """獲取模板投影片中的佔位符"""
@@ -146,224 +324,1309 @@ def copy_text_to_shape(source_text, target_shape, is_title=False):
     
     return True
 
-def copy_all_shapes_from_template(template_slide, new_slide):
+def copy_all_shapes_from_template(template_slide, new_slide, transplanter=None):
     """從模板投影片複製所有形狀（包括佔位符）到新投影片"""
-    copied_shapes = []
-    for shape in template_slide.shapes:
+    return ShapeFragment(template_slide).insert_into(new_slide, transplanter)
+
+# 關聯屬性（r:embed、r:link、r:id）所在的命名空間
+_R_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+def image_digest(part, digests):
+    """圖片部件的內容雜湊，結果快取在 digests（部件 -> 雜湊）中"""
+    digest = digests.get(part)
+    if digest is None:
+        if isinstance(part, _ZipBackedBlob):
+            digest = part.content_digest()
+        else:
+            digest = hashlib.sha1(part.blob).hexdigest()
+        digests[part] = digest
+    return digest
+
+
+class ImageTransplanter:
+    """把輸入簡報的圖片部件直接掛到輸出簡報，依內容雜湊去重，不重新讀取或偵測圖片"""
+
+    def __init__(self, output_package, digests=None):
+        self.package = output_package
+        # 圖片雜湊可由同一次轉換的所有風格共用（見 DeckAnalysis.image_digests）
+        self.digests = digests if digests is not None else {}
+        self._parts_by_digest = {}
+        self._used_partnames = {
+            part.partname for part in output_package.iter_parts()
+            if part.partname.startswith('/ppt/media/')
+        }
+        self._next_index = 1
+
+    def digest(self, source_part):
+        """計算（並快取）來源圖片部件的內容雜湊"""
+        return image_digest(source_part, self.digests)
+
+    def image_part_for(self, source_part):
+        """取得輸出簡報中與來源內容相同的圖片部件，不存在時直接共用來源的 blob 建立"""
+        digest = self.digest(source_part)
+        image_part = self._parts_by_digest.get(digest)
+        if image_part is None:
+            image_part = self._create_part(source_part, self._next_partname(source_part.partname.ext))
+            self._parts_by_digest[digest] = image_part
+            # 輸出部件與來源內容相同，記錄雜湊供增量轉換時不必重算
+            self.digests[image_part] = digest
+        return image_part
+
+    def _create_part(self, source_part, partname):
+        return ImagePart(
+            partname,
+            source_part.content_type,
+            self.package,
+            source_part.blob,
+            getattr(source_part, '_filename', None)
+        )
+
+    def _next_partname(self, ext):
+        while True:
+            partname = PackURI(f'/ppt/media/image{self._next_index}.{ext}')
+            self._next_index += 1
+            if partname not in self._used_partnames:
+                self._used_partnames.add(partname)
+                return partname
+
+
+class _ZipBackedBlob:
+    """低記憶體模式的二進位部件：內容留在輸入簡報的 zip 中，每次需要時才讀取，不常駐記憶體"""
+
+    def __init__(self, partname, content_type, package, archive, member):
+        self._archive = archive
+        self._member = member
+        super().__init__(partname, content_type, package, None)
+
+    @property
+    def _blob(self):
+        return self._archive.read(self._member)
+
+    @_blob.setter
+    def _blob(self, value):
+        # Part.__init__ 會設定 _blob；內容一律從 zip 讀取
+        pass
+
+    @property
+    def size(self):
+        return self._archive.getinfo(self._member).file_size
+
+    def open(self):
+        """以串流方式開啟內容"""
+        return self._archive.open(self._member)
+
+    def content_digest(self):
+        """分段計算內容的 SHA-1（與 hashlib.sha1(blob) 相同），不必一次讀入整個檔案"""
+        sha = hashlib.sha1()
+        with self.open() as f:
+            for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+
+class ZipImagePart(_ZipBackedBlob, ImagePart):
+    """內容留在 zip 中的圖片部件"""
+
+
+class ZipBlobPart(_ZipBackedBlob, Part):
+    """內容留在 zip 中的其他二進位部件（影片、內嵌物件、字型等）"""
+
+
+class _StreamingPackageLoader(_PackageLoader):
+    """只解析 XML 部件的簡報載入器：圖片與其他二進位部件以 ZipImagePart／ZipBlobPart 代表"""
+
+    def __init__(self, pkg_file, package, archive):
+        super().__init__(pkg_file, package)
+        self._archive = archive
+
+    @lazyproperty
+    def _package_reader(self):
+        return _ZipMemberReader(self._archive)
+
+    @lazyproperty
+    def _parts(self):
+        content_types = self._content_types
+        package_reader = self._package_reader
+        parts = {}
+        for partname in self._xml_rels:
+            if partname == '/' or partname not in package_reader:
+                continue
+            content_type = content_types[partname]
+            if content_type.startswith('image/'):
+                parts[partname] = ZipImagePart(partname, content_type, self._package, self._archive,
+                                               partname.membername)
+            elif not content_type.endswith('xml'):
+                parts[partname] = ZipBlobPart(partname, content_type, self._package, self._archive,
+                                              partname.membername)
+            else:
+                parts[partname] = PartFactory(partname, content_type, self._package, blob=package_reader[partname])
+        return parts
+
+
+class _ZipMemberReader:
+    """依需要讀取單一 zip 成員的套件讀取器（python-pptx 預設會一次讀入所有成員）"""
+
+    def __init__(self, archive):
+        self._archive = archive
+        self._names = set(archive.namelist())
+
+    def __contains__(self, pack_uri):
+        return pack_uri.membername in self._names
+
+    def __getitem__(self, pack_uri):
+        if pack_uri.membername not in self._names:
+            raise KeyError(f"no member '{pack_uri}' in package")
+        return self._archive.read(pack_uri.membername)
+
+    def rels_xml_for(self, partname):
+        uri = partname.rels_uri
+        return self[uri] if uri in self else None
+
+
+class _StreamingPackage(Package):
+    """以 _StreamingPackageLoader 載入的簡報套件，用完需呼叫 close() 關閉輸入 zip"""
+
+    archive = None
+
+    def _load(self):
+        self.archive = zipfile.ZipFile(self._pkg_file)
         try:
-            el = shape.element
-            new_el = deepcopy(el)
-            new_slide.shapes._spTree.insert_element_before(new_el, 'p:extLst')
-            copied_shapes.append(shape.name)
-        except Exception as e:
-            print(f"    ⚠ 無法複製形狀 {shape.name}: {e}")
-    return copied_shapes
+            pkg_xml_rels, parts = _StreamingPackageLoader(self._pkg_file, self, self.archive)._load()
+            self._rels.load_from_xml(PACKAGE_URI, pkg_xml_rels, parts)
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+
+def open_presentation_streaming(input_file):
+    """開啟簡報但不把圖片等二進位部件讀入記憶體；簡報的 part.package.close() 會關閉輸入 zip"""
+    package = _StreamingPackage.open(_as_input_file(input_file))
+    try:
+        return package.main_document_part.presentation
+    except Exception:
+        package.close()
+        raise
+
+
+class StreamingPackageWriter:
+    """低記憶體模式的輸出：圖片在第一次用到時就從輸入 zip 串流寫進輸出 zip，其餘部件在 finish() 時寫入
+
+    寫出的部件與 python-pptx 的 save() 相同，只是 zip 中的成員順序不同。
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self._zip = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED)
+        self._written = set()
+
+    def write_streamed(self, part):
+        """從輸入 zip 分段複製部件內容，同一時間只有一個區塊在記憶體中"""
+        with part.open() as source, \
+                self._zip.open(part.partname.membername, 'w', force_zip64=part.size > zipfile.ZIP64_LIMIT) as target:
+            shutil.copyfileobj(source, target, STREAM_CHUNK_SIZE)
+        self._written.add(part.partname)
+
+    def finish(self, package):
+        """寫入 [Content_Types].xml、關聯與尚未寫出的部件並關閉輸出"""
+        parts = tuple(package.iter_parts())
+        self._zip.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+        self._zip.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+        for part in parts:
+            if part.partname not in self._written:
+                if isinstance(part, _ZipBackedBlob):
+                    self.write_streamed(part)
+                else:
+                    self._zip.writestr(part.partname.membername, part.blob)
+            if part._rels:
+                self._zip.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        self._zip.close()
+
+    def abort(self):
+        """轉換失敗時關閉輸出；輸出為路徑時刪除寫到一半的檔案"""
+        self._zip.close()
+        if isinstance(self.output, (str, os.PathLike)):
+            try:
+                os.remove(self.output)
+            except OSError:
+                pass
+
+
+class StreamingImageTransplanter(ImageTransplanter):
+    """低記憶體模式的圖片搬移：輸出圖片部件同樣指向輸入 zip，並在第一次用到時立即寫進輸出"""
+
+    def __init__(self, output_package, writer, digests=None):
+        super().__init__(output_package, digests)
+        self.writer = writer
+
+    def _create_part(self, source_part, partname):
+        if not isinstance(source_part, ZipImagePart):
+            return super()._create_part(source_part, partname)
+        image_part = ZipImagePart(partname, source_part.content_type, self.package,
+                                  source_part._archive, source_part._member)
+        self.writer.write_streamed(image_part)
+        return image_part
+
+
+def transplant_picture(picture, new_slide, transplanter):
+    """複製原始 p:pic XML（保留裁切、效果與替代文字），並重新對應其關聯"""
+    pic = deepcopy(picture._element)
+    source_part = picture.part
+    target_part = new_slide.part
+
+    # 先解析所有關聯，遇到不支援的類型（例如影片）就在修改投影片前放棄
+    remapped = []
+    for el in pic.iter():
+        for attr, rId in el.attrib.items():
+            if not attr.startswith(_R_NS):
+                continue
+            rel = source_part.rels[rId]
+            if rel.is_external:
+                remapped.append((el, attr, rel.target_ref, rel.reltype, True))
+            elif rel.reltype == RT.IMAGE:
+                remapped.append((el, attr, transplanter.image_part_for(rel.target_part), rel.reltype, False))
+            else:
+                raise ValueError(f"不支援的圖片關聯類型: {rel.reltype}")
 
-def copy_images_from_input(input_slide, new_slide):
+    for el, attr, target, reltype, is_external in remapped:
+        el.set(attr, target_part.relate_to(target, reltype, is_external=is_external))
+
+    pic.nvPicPr.cNvPr.id = new_slide.shapes._next_shape_id
+    new_slide.shapes._spTree.insert_element_before(pic, 'p:extLst')
+
+
+class ShapeFragment:
+    """模板投影片形狀樹的預先編譯結果
+
+    所有形狀放在同一個容器元素中，套用時整組 deepcopy 一次、再以切片一次插入新投影片；
+    形狀引用的關聯（圖片、超連結）在編譯時就解析好目標，套用時只需在新投影片上建立關聯。
+    """
+
+    def __init__(self, slide):
+        self.names = []
+        # (元素在容器 iter() 中的順序, 屬性, 關聯類型, 目標, 是否外部)
+        self.references = []
+        self._container = OxmlElement('p:spTree')
+        source_part = slide.part
+        references = []
+
+        for shape in slide.shapes:
+            try:
+                el = deepcopy(shape.element)
+                shape_references = []
+                for node in el.iter():
+                    for attr, rId in node.attrib.items():
+                        if not attr.startswith(_R_NS):
+                            continue
+                        rel = source_part.rels[rId]
+                        if rel.is_external:
+                            shape_references.append((node, attr, rel.reltype, rel.target_ref, True))
+                        elif rel.reltype == RT.IMAGE:
+                            shape_references.append((node, attr, rel.reltype, rel.target_part, False))
+                        else:
+                            # 其他內部關聯（例如影片、圖表）無法在輸出簡報中對應，直接複製只會留下失效的 rId
+                            raise ValueError(f"不支援的形狀關聯類型: {rel.reltype}")
+            except Exception as e:
+                logger.warning("無法複製形狀 %s: %s", shape.name, e)
+                continue
+            self._container.append(el)
+            self.names.append(shape.name)
+            references.extend(shape_references)
+
+        if references:
+            positions = {node: i for i, node in enumerate(self._container.iter())}
+            self.references = [
+                (positions[node], attr, reltype, target, is_external)
+                for node, attr, reltype, target, is_external in references
+            ]
+
+    @classmethod
+    def from_xml(cls, xml, names, references):
+        """從序列化的容器 XML 還原；references 中的圖片目標需已是圖片部件"""
+        fragment = cls.__new__(cls)
+        fragment.names = list(names)
+        fragment.references = list(references)
+        fragment._container = parse_xml(xml)
+        return fragment
+
+    def to_xml(self):
+        """序列化容器（含所有形狀）為 XML bytes"""
+        return etree.tostring(self._container, encoding='UTF-8')
+
+    def insert_into(self, new_slide, transplanter=None):
+        """將整組形狀插入新投影片（p:extLst 之前），回傳形狀名稱列表"""
+        fragment = deepcopy(self._container)
+        if self.references:
+            if transplanter is None:
+                transplanter = ImageTransplanter(new_slide.part.package)
+            target_part = new_slide.part
+            nodes = list(fragment.iter())
+            for position, attr, reltype, target, is_external in self.references:
+                if not is_external:
+                    target = transplanter.image_part_for(target)
+                nodes[position].set(attr, target_part.relate_to(target, reltype, is_external=is_external))
+
+        spTree = new_slide.shapes._spTree
+        ext_lst = spTree.find(qn('p:extLst'))
+        position = len(spTree) if ext_lst is None else spTree.index(ext_lst)
+        spTree[position:position] = list(fragment)
+        return list(self.names)
+
+
+def copy_images_from_input(input_slide, new_slide, transplanter=None):
     """從輸入投影片複製圖片到新投影片"""
+    if transplanter is None:
+        transplanter = ImageTransplanter(new_slide.part.package)
+    
     images_copied = 0
     for shape in input_slide.shapes:
         if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
             try:
-                # 獲取圖片資訊
-                image = shape.image
-                image_bytes = image.blob
-                
-                # 在新投影片中添加圖片
-                left = shape.left
-                top = shape.top
-                width = shape.width
-                height = shape.height
-                
+                # 直接連結原始圖片部件並複製 p:pic
+                transplant_picture(shape, new_slide, transplanter)
+                images_copied += 1
+                continue
+            except Exception as e:
+                logger.debug("無法直接搬移圖片，改為重新加入: %s", e)
+            
+            try:
                 # 使用圖片的二進制數據創建新圖片
-                pic = new_slide.shapes.add_picture(
-                    io.BytesIO(image_bytes),
-                    left, top, width, height
+                new_slide.shapes.add_picture(
+                    io.BytesIO(shape.image.blob),
+                    shape.left, shape.top, shape.width, shape.height
                 )
                 images_copied += 1
             except Exception as e:
-                print(f"    ⚠ 無法複製圖片: {e}")
+                logger.warning("無法複製圖片: %s", e)
     
     return images_copied
 
-def create_from_template(input_path, template_path, output_path):
-    """讀取輸入PPT和模板PPT，將內容套用到模板生成新PPT"""
-    print(f"\n=== 開始處理 ===")
-    print(f"輸入檔案: {input_path}")
-    print(f"模板檔案: {template_path}")
+
+class CompiledSlide:
+    """模板投影片的預先解析結果：佈局、佔位符位置與形狀片段
+
+    佔位符只保留位置與 idx（不含形狀物件），才能與形狀片段一起寫入模板產物。
+    """
+
+    def __init__(self, index, slide):
+        self.index = index
+        self.slide = slide
+        self.layout_name = slide.slide_layout.name
+        self.layout_partname = slide.slide_layout.part.partname
+        self.placeholders = {
+            kind: [{key: value for key, value in entry.items() if key != 'shape'} for entry in entries]
+            for kind, entries in get_template_placeholders(slide).items()
+        }
+        self.fragment = ShapeFragment(slide)
+        # 由 CompiledTemplate 在試排的投影片上統計（見 slide_capabilities）
+        self.capabilities = None
+
+    @classmethod
+    def from_manifest(cls, entry, fragment):
+        """從模板產物的清單還原（沒有對應的 python-pptx 投影片物件）"""
+        compiled_slide = cls.__new__(cls)
+        compiled_slide.index = entry['index']
+        compiled_slide.slide = None
+        compiled_slide.layout_name = entry['layout_name']
+        compiled_slide.layout_partname = PackURI(entry['layout_partname'])
+        compiled_slide.placeholders = entry['placeholders']
+        compiled_slide.fragment = fragment
+        compiled_slide.capabilities = entry['capabilities']
+        return compiled_slide
+
+
+class CompiledTemplate:
+    """只解析一次的模板，每次轉換再從中複製一份輕量的輸出簡報
+
+    可另外寫成模板產物（見 write_template_artifact），之後的行程直接載入產物而不必重新解析模板；
+    從產物載入時 presentation 為 None。
+    """
+
+    def __init__(self, template_path, source_digest=None):
+        self.path = os.path.abspath(template_path)
+        self.mtime = os.path.getmtime(self.path)
+        self.digest = source_digest or _file_digest(self.path)
+        self.presentation = Presentation(self.path)
+        self.layout_count = len(self.presentation.slide_layouts)
+        self.slides = [CompiledSlide(i, slide) for i, slide in enumerate(self.presentation.slides)]
+
+        # 輸出用的底稿：移除模板投影片並清掉只被它們使用的部件
+        self.base = _clone_presentation(self.presentation)
+        xml_slides = self.base.slides._sldIdLst
+        for sldId in list(xml_slides):
+            xml_slides.remove(sldId)
+        self.bytes_reclaimed = prune_orphaned_parts(self.base)
+        self._index_capabilities()
+
+    def _index_capabilities(self):
+        """在底稿的複本上依轉換時的方式建立每張模板投影片（佈局佔位符 + 形狀片段），統計可填入的位置"""
+        scratch = self.clone()
+        layouts = _layouts_by_partname(scratch)
+        for compiled_slide in self.slides:
+            slide = scratch.slides.add_slide(layouts[compiled_slide.layout_partname])
+            compiled_slide.fragment.insert_into(slide)
+            compiled_slide.capabilities = slide_capabilities(slide)
+
+    def clone(self):
+        """複製出可修改的空白簡報（只複製 XML，圖片等二進位內容直接共用）"""
+        return _clone_presentation(self.base)
+
+    def to_artifact(self, source_digest):
+        """序列化為模板產物（zip）：底稿簡報、各投影片的清單與形狀片段，以及片段引用的圖片"""
+        buffer = io.BytesIO()
+        self.base.save(buffer)
+        media = {}
+        slides = []
+        fragments = []
+        for compiled_slide in self.slides:
+            fragment = compiled_slide.fragment
+            references = []
+            for position, attr, reltype, target, is_external in fragment.references:
+                if not is_external:
+                    # 圖片以內容雜湊命名，同一張圖只存一份
+                    name = f"{hashlib.sha1(target.blob).hexdigest()}.{target.partname.ext}"
+                    media[name] = target
+                    target = name
+                references.append([position, attr, reltype, target, is_external])
+            slides.append({
+                'index': compiled_slide.index,
+                'layout_name': compiled_slide.layout_name,
+                'layout_partname': str(compiled_slide.layout_partname),
+                'placeholders': compiled_slide.placeholders,
+                'capabilities': compiled_slide.capabilities,
+                'names': fragment.names,
+                'references': references
+            })
+            fragments.append(fragment.to_xml())
+
+        manifest = {
+            'format': TEMPLATE_ARTIFACT_FORMAT,
+            'engine_version': ENGINE_VERSION,
+            'source_sha256': source_digest,
+            'source_name': os.path.basename(self.path),
+            'layout_count': self.layout_count,
+            'bytes_reclaimed': self.bytes_reclaimed,
+            'slides': slides,
+            'media': {name: part.content_type for name, part in media.items()}
+        }
+
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False))
+            # 底稿與圖片本身已經壓縮過，不再重複壓縮
+            archive.writestr('base.pptx', buffer.getvalue(), compress_type=zipfile.ZIP_STORED)
+            for i, xml in enumerate(fragments):
+                archive.writestr(f'fragments/{i}.xml', xml)
+            for name, part in media.items():
+                archive.writestr(f'media/{name}', part.blob, compress_type=zipfile.ZIP_STORED)
+        return output.getvalue()
+
+    @classmethod
+    def from_artifact(cls, template_path, data, source_digest):
+        """從模板產物還原；產物與模板內容、產物格式或引擎版本不符時丟出 ValueError"""
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            manifest = json.loads(archive.read('manifest.json'))
+            if manifest.get('format') != TEMPLATE_ARTIFACT_FORMAT:
+                raise ValueError(f"不支援的模板產物格式: {manifest.get('format')}")
+            if manifest.get('engine_version') != ENGINE_VERSION:
+                raise ValueError(f"模板產物由引擎 {manifest.get('engine_version')} 產生")
+            if manifest.get('source_sha256') != source_digest:
+                raise ValueError("模板內容已變更")
+
+            media = {
+                name: ImagePart(PackURI(f'/ppt/media/{name}'), content_type, None, archive.read(f'media/{name}'))
+                for name, content_type in manifest['media'].items()
+            }
+            compiled = cls.__new__(cls)
+            compiled.path = os.path.abspath(template_path)
+            compiled.mtime = os.path.getmtime(compiled.path)
+            compiled.digest = source_digest
+            compiled.presentation = None
+            compiled.base = Presentation(io.BytesIO(archive.read('base.pptx')))
+            compiled.layout_count = manifest['layout_count']
+            compiled.bytes_reclaimed = manifest['bytes_reclaimed']
+            compiled.slides = []
+            for i, entry in enumerate(manifest['slides']):
+                references = [
+                    (position, attr, reltype, target if is_external else media[target], is_external)
+                    for position, attr, reltype, target, is_external in entry['references']
+                ]
+                fragment = ShapeFragment.from_xml(archive.read(f'fragments/{i}.xml'), entry['names'], references)
+                compiled.slides.append(CompiledSlide.from_manifest(entry, fragment))
+        return compiled
+
+
+def prune_orphaned_parts(prs):
+    """刪除 sldIdLst 已不再引用的投影片，連同只被它們使用的關聯與媒體，回傳釋放的位元組數"""
+    package = prs.part.package
+    parts_before = set(package.iter_parts())
+
+    referenced = {sldId.rId for sldId in prs.slides._sldIdLst}
+    for rId, rel in list(prs.part.rels.items()):
+        if rel.reltype == RT.SLIDE and rId not in referenced:
+            prs.part.drop_rel(rId)
+
+    # 存檔時只會寫出從套件關聯可走到的部件，因此斷開關聯即代表刪除
+    parts_after = set(package.iter_parts())
+    return sum(len(part.blob) for part in parts_before - parts_after)
+
+
+def _clone_presentation(prs):
+    """不經過 zip 解壓與 XML 解析，直接複製整個簡報套件"""
+    source_package = prs.part.package
+    package = Package(None)
+    clones = {}
+
+    for part in source_package.iter_parts():
+        part_cls = type(part)
+        clone = part_cls.__new__(part_cls)
+        # 略過 lazyproperty 的快取值，讓複本重新計算
+        for name, value in part.__dict__.items():
+            if not isinstance(getattr(part_cls, name, None), lazyproperty):
+                clone.__dict__[name] = value
+        clone._package = package
+        if isinstance(part, XmlPart):
+            clone._element = deepcopy(part._element)
+        clones[part] = clone
+
+    def copy_rels(source_rels, target_rels):
+        for rId, rel in source_rels.items():
+            target = rel.target_ref if rel.is_external else clones[rel.target_part]
+            target_rels._rels[rId] = _Relationship(
+                source_rels._base_uri, rId, rel.reltype, rel._target_mode, target
+            )
+
+    copy_rels(source_package._rels, package._rels)
+    for part, clone in clones.items():
+        copy_rels(part.rels, clone.rels)
+
+    return package.presentation_part.presentation
+
+
+def _layouts_by_partname(prs):
+    """簡報中所有佈局，以部件名稱為鍵"""
+    return {
+        layout.part.partname: layout
+        for master in prs.slide_masters
+        for layout in master.slide_layouts
+    }
+
+
+def template_artifact_path(template_path):
+    """模板產物與模板放在同一個資料夾，檔名為模板檔名加上 TEMPLATE_ARTIFACT_SUFFIX"""
+    return f"{os.path.abspath(template_path)}{TEMPLATE_ARTIFACT_SUFFIX}"
+
+
+def _file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def write_template_artifact(compiled, source_digest=None):
+    """將已編譯模板寫成模板產物（先寫暫存檔再改名，多個行程同時寫入也不會讀到半個檔案），回傳產物路徑"""
+    if source_digest is None:
+        source_digest = compiled.digest
+    artifact_path = template_artifact_path(compiled.path)
+    tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(compiled.to_artifact(source_digest))
+        os.replace(tmp_path, artifact_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return artifact_path
+
+
+def load_template_artifact(template_path, source_digest=None):
+    """載入模板旁的產物；產物不存在、已過期或損毀時回傳 None"""
+    artifact_path = template_artifact_path(template_path)
+    if not os.path.exists(artifact_path):
+        return None
+    if source_digest is None:
+        source_digest = _file_digest(template_path)
+    try:
+        with open(artifact_path, 'rb') as f:
+            return CompiledTemplate.from_artifact(template_path, f.read(), source_digest)
+    except Exception as e:
+        logger.info("略過模板產物 %s: %s", artifact_path, e)
+        return None
+
+
+def compile_template(template_path, write_artifact=True):
+    """優先載入模板產物；產物不能用時重新解析模板，並（預設）寫回產物供之後的行程使用"""
+    path = os.path.abspath(template_path)
+    source_digest = _file_digest(path)
+    compiled = load_template_artifact(path, source_digest)
+    if compiled is None:
+        compiled = CompiledTemplate(path, source_digest)
+        if write_artifact:
+            try:
+                write_template_artifact(compiled, source_digest)
+            except OSError as e:
+                # 模板資料夾唯讀時仍可轉換，只是每次都要重新解析
+                logger.warning("無法寫入模板產物 %s: %s", template_artifact_path(path), e)
+    return compiled
+
+
+_template_cache = OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+def load_compiled_template(template_path):
+    """取得已編譯模板，以路徑與修改時間為快取鍵，超過上限時淘汰最久未使用者"""
+    path = os.path.abspath(template_path)
+    key = (path, os.path.getmtime(path))
+
+    with _template_cache_lock:
+        compiled = _template_cache.get(key)
+        if compiled is not None:
+            _template_cache.move_to_end(key)
+            return compiled
+
+    compiled = compile_template(path)
+
+    with _template_cache_lock:
+        # 同一路徑的舊版本（檔案已修改）直接移除
+        for stale_key in [k for k in _template_cache if k[0] == path and k != key]:
+            del _template_cache[stale_key]
+        _template_cache[key] = compiled
+        _template_cache.move_to_end(key)
+        while len(_template_cache) > TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+
+    return compiled
+
+
+def clear_template_cache():
+    """清空已編譯模板快取"""
+    with _template_cache_lock:
+        _template_cache.clear()
+
+
+def _emit(progress_callback, phase, started, slide_index=None, total_slides=None, **counts):
+    """送出階段事件（含單調時鐘的起訖時間與計數），回傳結束時間供下一個階段接續計時"""
+    finished = time.perf_counter()
+    event = {
+        'phase': phase,
+        'slide_index': slide_index,
+        'total_slides': total_slides,
+        'started': started,
+        'finished': finished,
+        'elapsed': finished - started,
+        'counts': counts
+    }
+    logger.debug("階段 %s 投影片 %s: %.4f 秒 %s", phase, slide_index, event['elapsed'], counts)
+    if progress_callback is not None:
+        progress_callback(event)
+    return finished
+
+
+class DeckAnalysis:
+    """輸入簡報的分析結果：每張投影片的標題、文字區塊與圖片，可重複套用到多個模板
+
+    分析結果可用 to_json() 存下，之後以 from_json() 還原，不必重新開啟與分析原始簡報；
+    還原時若沒有提供 presentation，只能查看分析結果，套用模板時仍需要原始簡報來複製圖片。
+    """
+
+    def __init__(self, presentation, slide_infos):
+        self.presentation = presentation
+        self.slide_infos = slide_infos
+        # 圖片部件 -> 內容雜湊，讓所有風格共用同一份去重結果
+        self.image_digests = {}
+        # 增量轉換用的各投影片內容指紋（見 slide_fingerprint），未計算時為 None
+        self.fingerprints = None
+
+    @property
+    def total_slides(self):
+        return len(self.slide_infos)
+
+    def close(self):
+        """關閉低記憶體模式開啟的輸入 zip（一般模式不需要）"""
+        package = self.presentation.part.package if self.presentation is not None else None
+        if isinstance(package, _StreamingPackage):
+            package.close()
+
+    def iter_slides(self):
+        """依序產生 (輸入投影片, 分析結果)；預覽時只包含被選取的投影片"""
+        if self.presentation is None:
+            raise ValueError("此分析結果沒有對應的簡報，請以 from_json(data, presentation) 還原")
+        slides = self.presentation.slides
+        if len(slides) == len(self.slide_infos):
+            return zip(slides, self.slide_infos)
+        return ((slides[info.slide_index], info) for info in self.slide_infos)
+
+    def to_json(self):
+        """將分析結果序列化為 JSON 字串"""
+        return dumps_slide_infos(self.slide_infos)
+
+    @classmethod
+    def from_json(cls, data, presentation=None):
+        """從 to_json() 的結果還原；presentation 可為已開啟的簡報、路徑、檔案物件或 bytes"""
+        if presentation is not None and not hasattr(presentation, 'slides'):
+            presentation = Presentation(_as_input_file(presentation))
+        slide_infos = loads_slide_infos(data)
+        if presentation is not None and any(info.slide_index >= len(presentation.slides) for info in slide_infos):
+            raise ValueError(f"分析結果與簡報不符：簡報只有 {len(presentation.slides)} 張投影片")
+        return cls(presentation, slide_infos)
+
+
+def _as_input_file(input_file):
+    """bytes 包裝成檔案物件，路徑與檔案物件維持原樣"""
+    if isinstance(input_file, (bytes, bytearray, memoryview)):
+        return io.BytesIO(input_file)
+    return input_file
+
+
+def preview_slide_indices(total_slides, preview_slides=None):
+    """預覽模式要轉換的投影片：前 preview_slides 張加上最後一張（結尾頁）；None 表示全部"""
+    if preview_slides is None or preview_slides + 1 >= total_slides:
+        return list(range(total_slides))
+    return list(range(preview_slides)) + [total_slides - 1]
+
+
+def analyze_deck(input_file, progress_callback=None, preview_slides=None, slide_store=None, low_memory=False):
+    """讀取輸入PPT並分析所有投影片（多個模板只需執行一次）
+
+    input_file 可以是路徑、檔案物件或 bytes；指定 preview_slides 時只分析預覽要用的投影片。
+    有 slide_store 時為增量模式：計算每張投影片的內容指紋，內容未變更的投影片直接取用上次的分析結果。
+    low_memory 為 True 時圖片等二進位部件留在輸入 zip 中（見 open_presentation_streaming），用完需呼叫 close()。
+    """
+    started = time.perf_counter()
+    if low_memory:
+        input_prs = open_presentation_streaming(input_file)
+    else:
+        input_prs = Presentation(_as_input_file(input_file))
+    total_slides = len(input_prs.slides)
+    started = _emit(progress_callback, 'load', started, total_slides=total_slides, slides=total_slides)
+    logger.info("讀取輸入PPT: 共 %d 張投影片", total_slides)
     
-    # 1. 讀取輸入PPT
-    input_prs = Presentation(input_path)
-    print(f"\n讀取輸入PPT: 共 {len(input_prs.slides)} 張投影片")
+    indices = preview_slide_indices(total_slides, preview_slides)
+    if len(indices) < total_slides:
+        logger.info("預覽模式: 只轉換 %d/%d 張投影片", len(indices), total_slides)
+    slides = input_prs.slides
+    slide_infos = []
+    image_digests = {}
+    fingerprints = [] if slide_store is not None else None
+    for position, i in enumerate(indices):
+        slide_info = None
+        if slide_store is not None:
+            fingerprint = slide_fingerprint(slides[i], image_digests)
+            fingerprints.append(fingerprint)
+            slide_info = _cached_slide_info(slide_store, fingerprint, i, total_slides)
+        if slide_info is None:
+            slide_info = analyze_input_slide(slides[i], i, total_slides)
+            if slide_store is not None:
+                _store_entry(slide_store, fingerprint, {'slide_info': slide_info.to_list()})
+        slide_infos.append(slide_info)
+        started = _emit(
+            progress_callback, 'analyze', started, position, len(indices),
+            text_blocks=len(slide_info.text_blocks),
+            images=len(slide_info.images)
+        )
     
-    # 2. 讀取模板PPT
-    template_prs = Presentation(template_path)
-    print(f"讀取模板PPT: 共 {len(template_prs.slide_layouts)} 種佈局")
+    analysis = DeckAnalysis(input_prs, slide_infos)
+    analysis.image_digests = image_digests
+    analysis.fingerprints = fingerprints
+    return analysis
+
+
+def slide_fingerprint(slide, image_digests):
+    """輸入投影片的內容指紋：引擎版本、佈局名稱、投影片 XML 與引用的圖片內容雜湊
+
+    包含會影響分析與套用結果的所有內容；投影片在簡報中的位置另外由首尾位置與模板分配決定（見 render_deck）。
+    """
+    sha = hashlib.sha256()
+    sha.update(f"{ENGINE_VERSION}|{slide.slide_layout.name}|".encode())
+    sha.update(etree.tostring(slide._element))
+    for rId, rel in sorted(slide.part.rels.items()):
+        if rel.is_external:
+            sha.update(f"|{rId}|{rel.reltype}|{rel.target_ref}".encode())
+        elif rel.reltype == RT.IMAGE:
+            sha.update(f"|{rId}|{image_digest(rel.target_part, image_digests)}".encode())
+    return sha.hexdigest()
+
+
+def _cached_slide_info(slide_store, fingerprint, slide_index, total_slides):
+    """取出內容相同的投影片上次的分析結果，並換成這次在簡報中的位置"""
+    entry = slide_store.get(fingerprint)
+    if entry is None or 'slide_info' not in entry:
+        return None
+    slide_info = SlideInfo.from_list(entry['slide_info'])
+    slide_info.slide_index = slide_index
+    slide_info.is_first = slide_index == 0
+    slide_info.is_last = slide_index == total_slides - 1
+    return slide_info
+
+
+def _store_entry(slide_store, key, entry):
+    # 快取寫不進去不影響轉換結果
+    try:
+        slide_store.put(key, entry)
+    except OSError as e:
+        logger.warning("無法寫入投影片快取: %s", e)
+
+
+def capture_slide(slide, transplanter):
+    """記錄已完成的輸出投影片：XML 與其中引用的關聯（圖片以內容雜湊表示）
+
+    含有圖片與外部連結以外的關聯時無法重建，回傳 None。
+    """
+    sld = slide._element
+    references = []
+    for position, node in enumerate(sld.iter()):
+        for attr, rId in node.attrib.items():
+            if not attr.startswith(_R_NS):
+                continue
+            rel = slide.part.rels[rId]
+            if rel.is_external:
+                references.append([position, attr, rel.reltype, rel.target_ref, True])
+            elif rel.reltype == RT.IMAGE:
+                references.append([position, attr, rel.reltype, transplanter.digest(rel.target_part), False])
+            else:
+                return None
+    return {'xml': etree.tostring(sld, encoding='unicode'), 'references': references}
+
+
+def restore_slide(entry, new_slide, transplanter, image_sources):
+    """以 capture_slide 的記錄取代新投影片的內容並重建關聯
+
+    image_sources 為內容雜湊 -> 來源圖片部件；缺少需要的圖片時不修改投影片並回傳 False。
+    """
+    references = entry['references']
+    if any(not is_external and target not in image_sources
+           for _, _, _, target, is_external in references):
+        return False
     
-    # 3. 創建基於模板的新簡報
-    output_prs = Presentation(template_path)
+    stored = parse_xml(entry['xml'])
+    nodes = list(stored.iter())
+    target_part = new_slide.part
+    for position, attr, reltype, target, is_external in references:
+        if not is_external:
+            target = transplanter.image_part_for(image_sources[target])
+        nodes[position].set(attr, target_part.relate_to(target, reltype, is_external=is_external))
     
-    # 移除模板中的現有投影片
-    xml_slides = output_prs.slides._sldIdLst
-    slides = list(xml_slides)
-    for s in slides:
-        xml_slides.remove(s)
+    # 保留 add_slide 建立的根元素（與佈局的關聯已建立），只換掉內容
+    sld = new_slide._element
+    for name, value in stored.attrib.items():
+        sld.set(name, value)
+    sld[:] = list(stored)
+    return True
+
+
+def create_from_template(input_path, template_path, output_path, progress_callback=None, preview_slides=None,
+                         slide_store=None, low_memory=False):
+    """讀取輸入PPT和模板PPT，將內容套用到模板生成新PPT
+
+    preview_slides 指定時為預覽模式：只轉換前 preview_slides 張與最後一張。
+    slide_store（slide_store.SlideStore）指定時為增量模式：內容與模板分配都沒變的投影片沿用上次的結果。
+    low_memory 為 True 時為低記憶體模式：輸入的圖片不讀入記憶體，轉換到哪張就把用到的圖片從輸入 zip
+    串流寫進輸出，峰值記憶體取決於簡報的 XML 與最大的單一區塊，而不是所有媒體的總和。
+    輸出內容與一般模式相同（只有 zip 中的成員順序不同）；輸出寫入檔案路徑時省下的記憶體最多。
+    """
+    logger.info("開始處理: 輸入檔案 %s，模板檔案 %s", input_path, template_path)
     
-    print(f"\n開始轉換投影片...")
+    analysis = analyze_deck(input_path, progress_callback, preview_slides, slide_store, low_memory)
+    try:
+        return render_deck(analysis, template_path, output_path, progress_callback, slide_store, low_memory)
+    finally:
+        analysis.close()
+
+
+def convert_to_bytes(input_file, template_path, progress_callback=None, preview_slides=None, slide_store=None,
+                     low_memory=False):
+    """完全在記憶體中轉換：輸入路徑、檔案物件或 bytes，回傳輸出簡報的 bytes"""
+    output = io.BytesIO()
+    create_from_template(input_file, template_path, output, progress_callback, preview_slides, slide_store,
+                         low_memory)
+    return output.getvalue()
+
+
+def fill_slide_text(new_slide, slide_info):
+    """把輸入投影片的標題與內容填入新投影片，並移除沒用到的文字區域
+
+    回傳 (替換的標題數, 替換的內容數, 移除的形狀數)。
+    """
+    # 準備要填入的內容
+    input_title = slide_info.title_text if slide_info.has_title else ''
+    input_contents = slide_info.content_texts
     
-    # 4. 逐張處理輸入投影片
-    for i, slide in enumerate(input_prs.slides):
-        print(f"\n處理投影片 {i+1}/{len(input_prs.slides)}")
-        
-        # 分析投影片內容
-        slide_info = analyze_input_slide(slide, i, len(input_prs.slides))
-        print(f"  原始佈局: {slide_info['layout_name']}")
-        print(f"  標題: {slide_info['title_text'][:50]}..." if slide_info['title_text'] else "  標題: 無")
-        print(f"  文字區塊: {len(slide_info['text_shapes'])}")
-        print(f"  圖片: {len(slide_info['image_shapes'])}")
+    # 獲取新投影片的文字形狀並替換內容（只走訪一次形狀樹）
+    title_shapes, content_shapes = classify_text_shapes(index_slide_shapes(new_slide))
+    
+    # 用過的形狀以 XML 元素記錄，判斷時不必逐一比對列表
+    used_elements = set()
+    
+    # 替換標題文字
+    title_replaced = 0
+    if input_title:
+        if len(title_shapes) > 0:
+            # 優先使用第一個標題形狀
+            title_shapes[0].text = input_title
+            copy_text_to_shape(input_title, title_shapes[0], is_title=True)
+            used_elements.add(title_shapes[0].element)
+            title_replaced += 1
+    
+    # 替換內容文字
+    content_replaced = 0
+    for i, content_text in enumerate(input_contents):
+        if i < len(content_shapes):
+            content_shapes[i].text = content_text
+            copy_text_to_shape(content_text, content_shapes[i], is_title=False)
+            used_elements.add(content_shapes[i].element)
+            content_replaced += 1
+    
+    if len(input_contents) > 0 and len(content_shapes) == 0:
+        logger.warning("投影片 %d: 有 %d 個內容但模板沒有內容區域",
+                       slide_info.slide_index + 1, len(input_contents))
+    
+    # 移除未使用的佔位符和文字框
+    removed_count = 0
+    shapes_to_remove = [
+        shape for shape in title_shapes + content_shapes
+        if shape.element not in used_elements
+    ]
+    
+    # 執行移除
+    for shape in shapes_to_remove:
+        try:
+            sp = shape.element
+            sp.getparent().remove(sp)
+            removed_count += 1
+        except Exception as e:
+            pass
+    
+    return title_replaced, content_replaced, removed_count
+
+
+def render_deck(analysis, template_path, output_path, progress_callback=None, slide_store=None, low_memory=False):
+    """將已分析的輸入簡報套用到模板並儲存
+
+    有 slide_store 時，每張完成的投影片以（內容指紋、模板內容、模板投影片、首尾位置）為鍵記錄下來，
+    下次遇到相同的組合直接還原，不必重新複製形狀、填入文字與複製圖片。
+    low_memory 為 True 時（分析也須以低記憶體模式進行），圖片在第一次用到時就串流寫進 output_path。
+    """
+    writer = StreamingPackageWriter(output_path) if low_memory else None
+    try:
+        return _render_deck(analysis, template_path, output_path, progress_callback, slide_store, writer)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+
+
+def _render_deck(analysis, template_path, output_path, progress_callback, slide_store, writer):
+    total_slides = analysis.total_slides
+    
+    # 1. 讀取模板PPT（已編譯的模板只會解析一次）
+    started = time.perf_counter()
+    compiled = load_compiled_template(template_path)
+    
+    # 2. 從已編譯模板複製出新簡報（模板投影片已事先移除）
+    output_prs = compiled.clone()
+    # 佈局必須取自輸出簡報本身，不能引用模板簡報的佈局
+    output_layouts = _layouts_by_partname(output_prs)
+    
+    # 圖片直接搬移原始部件，整份簡報共用同一個去重表
+    if writer is not None:
+        transplanter = StreamingImageTransplanter(output_prs.part.package, writer, analysis.image_digests)
+    else:
+        transplanter = ImageTransplanter(output_prs.part.package, analysis.image_digests)
+    
+    _emit(progress_callback, 'load', started, total_slides=total_slides,
+          layouts=compiled.layout_count, bytes_reclaimed=compiled.bytes_reclaimed)
+    logger.info("讀取模板PPT: 共 %d 種佈局，已移除模板投影片 %.1f KB",
+                compiled.layout_count, compiled.bytes_reclaimed / 1024)
+    
+    # 增量模式：還原投影片時需要依內容雜湊找回來源圖片（模板形狀的圖片與輸入投影片的圖片）
+    template_images = {}
+    if slide_store is not None:
+        for compiled_slide in compiled.slides:
+            for _, _, _, target, is_external in compiled_slide.fragment.references:
+                if not is_external:
+                    template_images[transplanter.digest(target)] = target
+    slides_reused = 0
+    slides_stored = 0
+    
+    # 3. 逐張處理輸入投影片（進度事件的 slide_index 為本次轉換中的順序）
+    for slide_index, (slide, slide_info) in enumerate(analysis.iter_slides()):
+        logger.debug("處理投影片 %d（%d/%d）: 佈局 %s，標題 %r，文字區塊 %d，圖片 %d",
+                     slide_info.slide_index + 1, slide_index + 1, total_slides, slide_info.layout_name,
+                     slide_info.title_text[:50], len(slide_info.text_blocks),
+                     len(slide_info.images))
         
         # 最後一頁：保留原始模板的最後一頁
-        if slide_info['is_last']:
-            print(f"  這是最後一頁，使用原始模板的最後一張投影片")
-            # 使用模板的最後一張投影片（如果有的話）
-            if len(template_prs.slides) > 0:
-                # 複製模板的最後一張投影片
-                template_last_slide = template_prs.slides[-1]
-                slide_layout = template_last_slide.slide_layout
-                new_slide = output_prs.slides.add_slide(slide_layout)
-                
-                # 複製模板投影片的所有形狀（包括佔位符和裝飾）
-                copy_all_shapes_from_template(template_last_slide, new_slide)
-                
-                # 只複製標題（如果有）
-                if slide_info['has_title']:
-                    try:
-                        if new_slide.shapes.title:
-                            new_slide.shapes.title.text = slide_info['title_text']
-                            copy_text_to_shape(slide_info['title_text'], new_slide.shapes.title, is_title=True)
-                            print(f"  >> 已複製標題到模板最後一頁")
-                    except:
-                        pass
-                
-                # 複製輸入投影片的圖片
-                images_copied = copy_images_from_input(slide, new_slide)
-                if images_copied > 0:
-                    print(f"  >> 已複製 {images_copied} 張圖片")
+        if slide_info.is_last and len(compiled.slides) == 0:
             continue
         
-        # 選擇合適的模板投影片
-        template_slide_index = select_template_slide(slide_info, template_prs.slides)
-        template_slide = template_prs.slides[template_slide_index]
-        
-        print(f"  使用模板投影片: 第{template_slide_index + 1}張 - {template_slide.slide_layout.name}")
-        
-        # 使用該模板投影片的佈局創建新投影片
-        slide_layout = template_slide.slide_layout
+        # 選擇合適的模板投影片，並使用它的佈局創建新投影片
+        started = time.perf_counter()
+        template_slide_index = select_template_slide(slide_info, compiled.slides)
+        compiled_slide = compiled.slides[template_slide_index]
+        slide_layout = output_layouts[compiled_slide.layout_partname]
         new_slide = output_prs.slides.add_slide(slide_layout)
+        started = _emit(progress_callback, 'select', started, slide_index, total_slides,
+                        template_slide=template_slide_index)
         
-        # 複製模板投影片的所有形狀（包括佔位符和裝飾）
-        copied_shapes = copy_all_shapes_from_template(template_slide, new_slide)
-        print(f"  >> 已複製 {len(copied_shapes)} 個形狀")
-        
-        # 準備要填入的內容
-        input_title = slide_info['title_text'] if slide_info['has_title'] else ''
-        input_contents = [s['text'] for s in slide_info['text_shapes'] if not s['is_title']]
-        
-        print(f"  輸入標題: {'有' if input_title else '無'}")
-        print(f"  輸入內容: {len(input_contents)} 個")
+        render_key = None
+        if slide_store is not None:
+            fingerprint = (analysis.fingerprints[slide_index] if analysis.fingerprints is not None
+                           else slide_fingerprint(slide, analysis.image_digests))
+            render_key = hashlib.sha256(
+                f"{fingerprint}|{compiled.digest}|{template_slide_index}|"
+                f"{slide_info.is_first}|{slide_info.is_last}".encode()
+            ).hexdigest()
+            entry = slide_store.get(render_key)
+            if entry is not None and 'xml' in entry:
+                image_sources = dict(template_images)
+                for rel in slide.part.rels.values():
+                    if not rel.is_external and rel.reltype == RT.IMAGE:
+                        image_sources[transplanter.digest(rel.target_part)] = rel.target_part
+                if restore_slide(entry, new_slide, transplanter, image_sources):
+                    slides_reused += 1
+                    _emit(progress_callback, 'reuse', started, slide_index, total_slides)
+                    continue
         
-        # 獲取新投影片的文字形狀並替換內容
-        text_shapes = [s for s in new_slide.shapes if s.has_text_frame]
-        title_shapes = []
-        content_shapes = []
+        # 複製模板投影片的所有形狀（包括佔位符和裝飾）
+        copied_shapes = compiled_slide.fragment.insert_into(new_slide, transplanter)
+        started = _emit(progress_callback, 'copy_shapes', started, slide_index, total_slides,
+                        shapes=len(copied_shapes))
         
-        for shape in text_shapes:
-            # 檢查是否有文字內容
-            has_text = shape.text.strip() != ''
-            
-            if shape.is_placeholder:
+        if slide_info.is_last:
+            # 最後一頁只複製標題（如果有）
+            title_replaced, content_replaced, removed_count = 0, 0, 0
+            if slide_info.has_title:
                 try:
-                    ptype = shape.placeholder_format.type
-                    if ptype == PP_PLACEHOLDER.TITLE or ptype == PP_PLACEHOLDER.CENTER_TITLE:
-                        title_shapes.append(shape)
-                    else:
-                        content_shapes.append(shape)
+                    if new_slide.shapes.title:
+                        new_slide.shapes.title.text = slide_info.title_text
+                        copy_text_to_shape(slide_info.title_text, new_slide.shapes.title, is_title=True)
+                        title_replaced = 1
                 except:
-                    content_shapes.append(shape)
-            else:
-                # 非佔位符的文字框
-                # 根據文字內容判斷是標題還是內容
-                if has_text:
-                    # 如果文字較短且位置靠上，視為標題候選
-                    if len(shape.text) < 100 and shape.top < Inches(2):
-                        title_shapes.append(shape)
-                    else:
-                        content_shapes.append(shape)
-                else:
-                    content_shapes.append(shape)
-        
-        # 按位置排序
-        title_shapes.sort(key=lambda x: (x.top, x.left))
-        content_shapes.sort(key=lambda x: (x.top, x.left))
-        
-        # 替換標題文字
-        title_replaced = 0
-        used_title_shapes = []
-        if input_title:
-            if len(title_shapes) > 0:
-                # 優先使用第一個標題形狀
-                title_shapes[0].text = input_title
-                copy_text_to_shape(input_title, title_shapes[0], is_title=True)
-                used_title_shapes.append(title_shapes[0])
-                title_replaced += 1
-                print(f"  >> 已替換標題文字")
-        
-        # 替換內容文字
-        content_replaced = 0
-        used_content_shapes = []
-        for i, content_text in enumerate(input_contents):
-            if i < len(content_shapes):
-                content_shapes[i].text = content_text
-                copy_text_to_shape(content_text, content_shapes[i], is_title=False)
-                used_content_shapes.append(content_shapes[i])
-                content_replaced += 1
-        
-        if content_replaced > 0:
-            print(f"  >> 已替換 {content_replaced} 個內容文字")
-        elif len(input_contents) > 0 and len(content_shapes) == 0:
-            print(f"  !! 警告: 有 {len(input_contents)} 個內容但模板沒有內容區域")
-        
-        # 移除未使用的佔位符和文字框
-        removed_count = 0
-        shapes_to_remove = []
-        
-        for shape in title_shapes:
-            if shape not in used_title_shapes:
-                shapes_to_remove.append(shape)
-        
-        for shape in content_shapes:
-            if shape not in used_content_shapes:
-                shapes_to_remove.append(shape)
-        
-        # 執行移除
-        for shape in shapes_to_remove:
-            try:
-                sp = shape.element
-                sp.getparent().remove(sp)
-                removed_count += 1
-            except Exception as e:
-                pass
-        
-        if removed_count > 0:
-            print(f"  >> 已移除 {removed_count} 個未使用的佔位符")
+                    pass
+        else:
+            title_replaced, content_replaced, removed_count = fill_slide_text(new_slide, slide_info)
+        started = _emit(progress_callback, 'fill_text', started, slide_index, total_slides,
+                        titles=title_replaced, contents=content_replaced, removed=removed_count)
         
         # 複製輸入投影片的圖片
-        images_copied = copy_images_from_input(slide, new_slide)
-        if images_copied > 0:
-            print(f"  >> 已複製 {images_copied} 張圖片")
+        images_copied = copy_images_from_input(slide, new_slide, transplanter)
+        _emit(progress_callback, 'copy_images', started, slide_index, total_slides,
+              images=images_copied)
+        
+        if render_key is not None:
+            entry = capture_slide(new_slide, transplanter)
+            if entry is not None:
+                _store_entry(slide_store, render_key, entry)
+                slides_stored += 1
+    
+    if slide_store is not None:
+        logger.info("增量轉換: 沿用 %d 張、重新產生 %d 張投影片", slides_reused, total_slides - slides_reused)
+        if slides_stored:
+            slide_store.prune()
+    
+    # 4. 儲存輸出檔案
+    started = time.perf_counter()
+    if writer is not None:
+        writer.finish(output_prs.part.package)
+    else:
+        output_prs.save(output_path)
+    _emit(progress_callback, 'save', started, total_slides=total_slides, slides=len(output_prs.slides))
+    logger.info("完成: 輸出檔案 %s", output_path)
+    
+    return {
+        'slide_count': analysis.total_slides,
+        'slides_reused': slides_reused,
+        'bytes_reclaimed': compiled.bytes_reclaimed
+    }
+
+
+_process_pool = None
+_process_pool_workers = None
+_process_pool_lock = threading.Lock()
+_event_manager = None
+
+
+def get_process_pool(max_workers=None):
+    """取得共用的行程池；重複使用同一個池可以保留各行程內的模板快取"""
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is not None and max_workers in (None, _process_pool_workers):
+            return _process_pool
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        workers = max_workers or os.cpu_count() or 1
+        # 使用 spawn，避免在多執行緒的 Streamlit 伺服器中 fork
+        _process_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        _process_pool_workers = workers
+        return _process_pool
+
+
+def _preload_templates(template_paths):
+    """在子行程中載入模板（放進該行程的已編譯模板快取），回傳行程編號"""
+    for template_path in template_paths:
+        load_compiled_template(template_path)
+    return os.getpid()
+
+
+def warm_process_pool(template_paths, max_workers=None):
+    """預先啟動共用行程池並讓各行程載入模板，第一個轉換不必等待行程啟動與模板解析；回傳已暖機的行程數
+
+    行程池不能指定由哪個行程執行，因此送出與行程數相同的工作，通常會分散到每個行程。
+    """
+    pool = get_process_pool(max_workers)
+    paths = [str(path) for path in template_paths]
+    futures = [pool.submit(_preload_templates, paths) for _ in range(_process_pool_workers)]
+    return len({future.result() for future in futures})
+
+
+def _get_event_manager():
+    """取得用來把子行程事件傳回主行程的 Manager（需要時才啟動）"""
+    global _event_manager
+    with _process_pool_lock:
+        if _event_manager is None:
+            _event_manager = multiprocessing.get_context('spawn').Manager()
+        return _event_manager
+
+
+def _reset_process_pool():
+    """行程池損毀時丟棄，下次使用時重新建立"""
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = None
+        _process_pool_workers = None
+
+
+def _convert_job(input_file, template_path, output_path, event_queue=None, preview_slides=None, slide_store=None,
+                 low_memory=False):
+    """在子行程中執行單一模板的轉換，錯誤以文字回傳避免無法序列化的例外
+
+    output_path 為 None 時不寫入磁碟，輸出內容放在結果的 'data'。
+    有 event_queue 時，進度事件會加上 template_path 後放入佇列。
+    """
+    progress_callback = None
+    if event_queue is not None:
+        def progress_callback(event):
+            event['template_path'] = template_path
+            event_queue.put(event)
     
-    # 5. 儲存輸出檔案
-    output_prs.save(output_path)
-    print(f"\n=== 完成 ===")
-    print(f"輸出檔案: {output_path}")
+    result = {
+        'input_path': input_file if isinstance(input_file, str) else None,
+        'template_path': template_path,
+        'output_path': output_path,
+        'data': None,
+        'slide_count': 0,
+        'slides_reused': 0,
+        'elapsed': 0.0,
+        'error': None,
+        'traceback': None
+    }
+    start = time.perf_counter()
+    try:
+        output = io.BytesIO() if output_path is None else output_path
+        stats = create_from_template(input_file, template_path, output, progress_callback, preview_slides,
+                                     slide_store, low_memory)
+        result['slide_count'] = stats['slide_count']
+        result['slides_reused'] = stats['slides_reused']
+        if output_path is None:
+            result['data'] = output.getvalue()
+    except Exception as e:
+        result['error'] = str(e)
+        result['traceback'] = traceback.format_exc()
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def _drain_events(event_queue, progress_callback):
+    """在呼叫端的執行緒中轉送子行程累積的事件"""
+    while True:
+        try:
+            event = event_queue.get_nowait()
+        except queue.Empty:
+            return
+        progress_callback(event)
+
+
+def convert_templates_parallel(input_file, jobs, max_workers=None, progress_callback=None, preview_slides=None,
+                               slide_store=None, low_memory=False):
+    """在行程池中同時套用多個模板，每完成一個模板就產生一筆結果
+
+    input_file 為路徑或 bytes；jobs 為 (template_path, output_path) 的列表，
+    output_path 為 None 時輸出以 bytes 放在結果的 'data'。結果依完成順序產生。
+    progress_callback 會在呼叫端的執行緒收到各子行程的進度事件（帶有 'template_path'）。
+    preview_slides 指定時所有工作都以預覽模式轉換；slide_store 指定時為增量轉換（各子行程共用同一個資料夾）；
+    low_memory 為 True 時各子行程以低記憶體模式轉換（見 create_from_template）。
+    """
+    return run_conversion_jobs(
+        [(input_file, template_path, output_path) for template_path, output_path in jobs],
+        max_workers=max_workers,
+        progress_callback=progress_callback,
+        preview_slides=preview_slides,
+        slide_store=slide_store,
+        low_memory=low_memory
+    )
+
 
+def run_conversion_jobs(jobs, max_workers=None, progress_callback=None, preview_slides=None, slide_store=None,
+                        low_memory=False):
+    """在行程池中執行任意組合的轉換工作，依完成順序產生結果
+
+    jobs 為 (input_file, template_path, output_path) 的列表，其餘同 convert_templates_parallel。
+    """
+    pool = get_process_pool(max_workers)
+    event_queue = _get_event_manager().Queue() if progress_callback else None
+    futures = {}
+    for input_file, template_path, output_path in jobs:
+        if isinstance(input_file, os.PathLike):
+            input_file = os.fspath(input_file)
+        future = pool.submit(
+            _convert_job,
+            input_file,
+            str(template_path),
+            None if output_path is None else str(output_path),
+            event_queue,
+            preview_slides,
+            slide_store,
+            low_memory
+        )
+        futures[future] = (input_file, template_path, output_path)
+
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+        if event_queue is not None:
+            _drain_events(event_queue, progress_callback)
+        for future in done:
+            yield _job_result(future, *futures[future])
+
+
+def _job_result(future, input_file, template_path, output_path):
+    """取出單一工作的結果，行程池損毀時轉成錯誤結果"""
+    try:
+        return future.result()
+    except BrokenProcessPool as e:
+        _reset_process_pool()
+        return {
+            'input_path': input_file if isinstance(input_file, str) else None,
+            'template_path': str(template_path),
+            'output_path': None if output_path is None else str(output_path),
+            'data': None,
+            'slide_count': 0,
+            'slides_reused': 0,
+            'elapsed': 0.0,
+            'error': f"轉換行程異常終止: {e}",
+            'traceback': traceback.format_exc()
+        }
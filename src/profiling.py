@@ -0,0 +1,194 @@
+"""單次轉換的效能分析報告（cProfile + tracemalloc）
+
+用來診斷特別慢或特別吃記憶體的簡報：在分析器下執行一次完整轉換，
+回傳累計耗時最高的函式、峰值記憶體與主要的記憶體配置位置，並附上可用 snakeviz 等工具開啟的 .prof 資料。
+
+    python profiling.py slow_deck.pptx --prof slow_deck.prof
+"""
+import argparse
+import cProfile
+import io
+import linecache
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from process_ppt import create_from_template
+
+PROJECT_ROOT = Path(__file__).parent.absolute().parent
+DEFAULT_TEMPLATE = PROJECT_ROOT / 'ppt' / 'template' / 'Maeve.pptx'
+
+# tracemalloc 每個配置保留的呼叫堆疊深度；越深越準確但越慢
+TRACE_FRAMES = 8
+
+# 記憶體比上一次快照多出這個比例時才重新拍快照，快照數量只隨記憶體成長的倍數增加
+SNAPSHOT_GROWTH = 1.1
+
+# cProfile 與 tracemalloc 都是整個行程共用的，同一時間只能分析一個轉換
+_profile_lock = threading.Lock()
+
+
+def _function_rows(stats, top):
+    """依累計耗時排序的前 top 個函式"""
+    rows = []
+    for (filename, line, name), (_, calls, total_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            'function': name,
+            'location': f"{filename}:{line}" if line else filename,
+            'calls': calls,
+            'total_time': total_time,
+            'cumulative_time': cumulative_time
+        })
+    rows.sort(key=lambda row: row['cumulative_time'], reverse=True)
+    return rows[:top]
+
+
+def _allocation_rows(snapshot, top):
+    """快照中配置量最高的程式碼位置（依最內層的呼叫位置合併）"""
+    if snapshot is None:
+        return []
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    rows = []
+    for stat in snapshot.statistics('lineno')[:top]:
+        frame = stat.traceback[0]
+        rows.append({
+            'location': f"{frame.filename}:{frame.lineno}",
+            'code': linecache.getline(frame.filename, frame.lineno).strip(),
+            'size': stat.size,
+            'count': stat.count
+        })
+    return rows
+
+
+def profile_conversion(input_file, template_path, output_path=None, progress_callback=None,
+                       preview_slides=None, top=25):
+    """在 cProfile 與 tracemalloc 下執行一次轉換，回傳報告 dict
+
+    報告包含 'elapsed'、'slide_count'、各階段耗時 'phases'、累計耗時最高的函式 'functions'、
+    'peak_memory'（位元組）、記憶體接近峰值時的主要配置位置 'allocation_sites'，
+    以及 pstats 格式的 'prof'（bytes，可直接寫成 .prof 檔）。
+    未指定 output_path 時，輸出簡報的內容放在 'data'。
+
+    tracemalloc 會讓轉換慢上數倍，函式耗時應看相對比例而不是絕對值；
+    它也只追蹤 Python 的配置，lxml 在 C 層配置的 XML 樹不計入峰值記憶體。
+    同一行程中的多個分析會依序執行。
+    """
+    with _profile_lock:
+        return _profile_conversion(input_file, template_path, output_path, progress_callback, preview_slides, top)
+
+
+def _profile_conversion(input_file, template_path, output_path, progress_callback, preview_slides, top):
+    phases = {}
+    state = {'snapshot': None, 'snapshot_size': 0}
+
+    def on_progress(event):
+        if progress_callback is not None:
+            progress_callback(event)
+        phases[event['phase']] = phases.get(event['phase'], 0.0) + event['elapsed']
+        # 記憶體創新高時保留快照，結束時用最接近峰值的那一張找出配置位置
+        current, _ = tracemalloc.get_traced_memory()
+        if current > state['snapshot_size'] * SNAPSHOT_GROWTH:
+            state['snapshot'] = tracemalloc.take_snapshot()
+            state['snapshot_size'] = current
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    tracemalloc.reset_peak()
+    baseline_memory, _ = tracemalloc.get_traced_memory()
+    profiler = cProfile.Profile()
+
+    output = io.BytesIO() if output_path is None else output_path
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            result = create_from_template(input_file, template_path, output, on_progress, preview_slides)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    stats = pstats.Stats(profiler)
+    report = {
+        'template_path': str(template_path),
+        'elapsed': elapsed,
+        'slide_count': result['slide_count'],
+        'phases': phases,
+        'functions': _function_rows(stats, top),
+        'peak_memory': max(peak - baseline_memory, 0),
+        'allocation_sites': _allocation_rows(state['snapshot'], top),
+        # 與 pstats.Stats.dump_stats 寫出的格式相同
+        'prof': marshal.dumps(stats.stats),
+        'data': output.getvalue() if output_path is None else None
+    }
+    return report
+
+
+def format_report(report, limit=15):
+    """將報告整理成純文字（命令列與網頁共用）"""
+    lines = [
+        f"模板: {os.path.basename(report['template_path'])}",
+        f"總耗時: {report['elapsed']:.2f} 秒（含分析器負擔）",
+        f"峰值記憶體: {report['peak_memory'] / 1024 / 1024:.1f} MB",
+        "",
+        "各階段耗時:",
+    ]
+    for phase, seconds in sorted(report['phases'].items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"  {phase:<12} {seconds * 1000:10.1f} ms")
+
+    lines += ["", f"{'累計':>10} {'本身':>10} {'呼叫數':>8}  函式"]
+    for row in report['functions'][:limit]:
+        lines.append(
+            f"{row['cumulative_time'] * 1000:8.1f}ms {row['total_time'] * 1000:8.1f}ms {row['calls']:>8}  "
+            f"{row['function']} ({_short_location(row['location'])})"
+        )
+
+    lines += ["", f"{'大小':>10} {'區塊數':>8}  配置位置"]
+    for row in report['allocation_sites'][:limit]:
+        lines.append(
+            f"{row['size'] / 1024:8.1f}KB {row['count']:>8}  {_short_location(row['location'])}  {row['code']}"
+        )
+    return '\n'.join(lines)
+
+
+def _short_location(location):
+    """只保留 site-packages、專案或標準函式庫之後的路徑，讓報告容易閱讀"""
+    for marker in ('site-packages' + os.sep, str(PROJECT_ROOT) + os.sep, os.path.dirname(os.__file__) + os.sep):
+        if marker in location:
+            return location.split(marker, 1)[1]
+    return location
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在 cProfile 與 tracemalloc 下執行一次轉換並輸出報告")
+    parser.add_argument('input', help="輸入簡報")
+    parser.add_argument('--template', default=str(DEFAULT_TEMPLATE), help="模板檔案")
+    parser.add_argument('--preview', type=int, help="只轉換前 N 張與結尾頁")
+    parser.add_argument('--prof', help="將 cProfile 結果寫入此 .prof 檔")
+    parser.add_argument('--top', type=int, default=15, help="顯示的函式與配置位置數")
+    args = parser.parse_args(argv)
+
+    report = profile_conversion(args.input, args.template, preview_slides=args.preview, top=max(args.top, 1))
+    print(format_report(report, args.top))
+    if args.prof:
+        with open(args.prof, 'wb') as f:
+            f.write(report['prof'])
+        print(f"\n已寫入 {args.prof}（可用 python -m pstats 或 snakeviz 開啟）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from process_ppt import ENGINE_VERSION
+
+
+def hash_bytes(data):
+    """計算內容的 SHA-256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+
+
+def hash_file(path):
+    """計算檔案內容的 SHA-256，檔案未修改時直接使用上次的結果"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _file_hashes_lock:
+        digest = _file_hashes.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with _file_hashes_lock:
+            _file_hashes[key] = digest
+    return digest
+
+
+class ResultCache:
+    """轉換結果快取：記憶體與磁碟兩層，各自有容量上限並以 LRU 淘汰
+
+    快取鍵由輸入內容雜湊、模板內容雜湊與引擎版本組成，
+    同一份簡報套用同一個模板時，不論來自哪個使用者都能直接取回結果。
+    """
+
+    def __init__(self, memory_budget=256 * 1024 * 1024, disk_budget=1024 * 1024 * 1024, disk_dir=None):
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget if disk_dir else 0
+        self.disk_dir = disk_dir
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(input_digest, template_path, variant=None):
+        """以輸入內容雜湊（hash_bytes）、模板內容雜湊與引擎版本組成快取鍵
+
+        variant 用來區分同一組輸入的不同輸出（例如預覽），避免與完整轉換的結果混用。
+        """
+        key = f"{input_digest}-{hash_file(template_path)}-{ENGINE_VERSION}"
+        return f"{key}-{variant}" if variant else key
+
+    def get(self, key):
+        """取得快取的輸出內容，找不到時回傳 None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+
+            if key in self._disk:
+                try:
+                    path = self._disk_path(key)
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    os.utime(path)
+                except OSError:
+                    self._disk_bytes -= self._disk.pop(key)
+                else:
+                    self._disk.move_to_end(key)
+                    self.disk_hits += 1
+                    self._put_memory(key, data)
+                    return data
+
+            self.misses += 1
+            return None
+
+    def put(self, key, data):
+        """存入輸出內容，超過容量時淘汰最久未使用的項目"""
+        with self._lock:
+            self._put_memory(key, data)
+            self._put_disk(key, data)
+
+    def stats(self):
+        """回傳命中次數與目前用量"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / total if total else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes
+            }
+
+    def clear(self):
+        """清空兩層快取"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in list(self._disk):
+                self._remove_disk(key)
+
+    def _put_memory(self, key, data):
+        if len(data) > self.memory_budget:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _put_disk(self, key, data):
+        if not self.disk_dir or len(data) > self.disk_budget:
+            return
+        if key in self._disk:
+            self._disk.move_to_end(key)
+            return
+        # 先寫入暫存檔再改名，避免其他行程讀到寫到一半的檔案
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        while self._disk_bytes > self.disk_budget:
+            self._remove_disk(next(iter(self._disk)))
+
+    def _remove_disk(self, key):
+        self._disk_bytes -= self._disk.pop(key)
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pptx")
+
+    def _load_disk_index(self):
+        """重新啟動後沿用磁碟上的快取，依最後存取時間排列 LRU 順序"""
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.pptx'):
+                continue
+            stat = os.stat(os.path.join(self.disk_dir, name))
+            entries.append((stat.st_atime, name[:-len('.pptx')], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        while self._disk_bytes > self.disk_budget:
+            self._remove_disk(next(iter(self._disk)))
@@ -0,0 +1,95 @@
+"""投影片分析結果的記錄型別
+
+每張投影片的分析結果以 __slots__ 類別保存，避免大量小 dict；
+序列化為固定欄位順序的 JSON 陣列，可存檔、跨工作階段快取，重新載入時不必再開啟原始簡報。
+"""
+import json
+
+# 序列化格式版本：欄位有增減時需更新，舊格式會被拒絕而不是讀錯欄位
+RECORD_FORMAT = 1
+
+
+class _Record:
+    """依 __slots__ 順序與 list 互轉的共用基底"""
+
+    __slots__ = ()
+
+    def __init__(self, *values, **fields):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+        for name in self.__slots__[len(values):]:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"{type(self).__name__} 沒有欄位: {', '.join(fields)}")
+
+    def to_list(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_list(cls, values):
+        if len(values) != len(cls.__slots__):
+            raise ValueError(f"{cls.__name__} 需要 {len(cls.__slots__)} 個欄位，收到 {len(values)} 個")
+        return cls(*values)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_list() == other.to_list()
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class TextBlock(_Record):
+    """輸入投影片上有文字的形狀"""
+
+    __slots__ = ('text', 'left', 'top', 'width', 'height', 'is_title')
+
+
+class ImageRef(_Record):
+    """輸入投影片上的圖片，以 shape_id 對回原始形狀"""
+
+    __slots__ = ('shape_id', 'left', 'top', 'width', 'height')
+
+
+class SlideInfo(_Record):
+    """單張輸入投影片的分析結果"""
+
+    __slots__ = (
+        'slide_index', 'is_first', 'is_last', 'layout_name', 'has_title', 'title_text',
+        'placeholder_count', 'text_blocks', 'images'
+    )
+
+    @property
+    def content_texts(self):
+        """標題以外的文字，依投影片上的順序"""
+        return [block.text for block in self.text_blocks if not block.is_title]
+
+    def to_list(self):
+        values = super().to_list()
+        values[-2] = [block.to_list() for block in self.text_blocks]
+        values[-1] = [image.to_list() for image in self.images]
+        return values
+
+    @classmethod
+    def from_list(cls, values):
+        info = super().from_list(values)
+        info.text_blocks = [TextBlock.from_list(block) for block in info.text_blocks]
+        info.images = [ImageRef.from_list(image) for image in info.images]
+        return info
+
+
+def dumps_slide_infos(slide_infos):
+    """將分析結果序列化為 JSON 字串"""
+    return json.dumps(
+        {'format': RECORD_FORMAT, 'slides': [info.to_list() for info in slide_infos]},
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+
+
+def loads_slide_infos(data):
+    """從 JSON 字串或 bytes 還原分析結果"""
+    payload = json.loads(data)
+    if payload.get('format') != RECORD_FORMAT:
+        raise ValueError(f"不支援的分析結果格式: {payload.get('format')}")
+    return [SlideInfo.from_list(values) for values in payload['slides']]
@@ -0,0 +1,93 @@
+"""增量轉換用的單張投影片快取
+
+以內容指紋為鍵，保存每張輸入投影片的分析結果與套用模板後的投影片 XML；
+重新上傳只改了幾張的簡報時，其餘投影片直接取用上次的結果，不必重新分析與套用模板。
+
+資料直接放在磁碟資料夾中（每個鍵一個 JSON 檔），行程池中的每個行程都能共用；
+物件本身只記錄資料夾與容量上限，可以直接傳給子行程。
+"""
+import json
+import os
+import time
+import uuid
+
+
+class SlideStore:
+    """以內容雜湊為鍵的投影片快取，超過容量時刪除最久未使用的項目"""
+
+    def __init__(self, directory, budget=256 * 1024 * 1024):
+        self.directory = directory
+        self.budget = budget
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        # 以前兩個字元分資料夾，避免單一資料夾中有太多檔案
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """取得項目，找不到或已損毀時回傳 None"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            # 更新修改時間作為最近使用時間
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, entry):
+        """寫入項目（先寫暫存檔再改名，其他行程不會讀到寫一半的檔案）"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def prune(self):
+        """總大小超過上限時，依最近使用時間刪除最舊的項目，回傳刪除數"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # 寫入中的暫存檔不計入；當機留下的超過一小時就清掉
+                if name.endswith('.tmp'):
+                    if time.time() - stat.st_mtime > 3600:
+                        self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        if total > self.budget:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.budget:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
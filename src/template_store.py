@@ -0,0 +1,82 @@
+"""模板資料夾與預先編譯的模板產物
+
+    python template_store.py              # 為 ppt/template 中的每個模板建立（或更新）產物
+    python template_store.py --force      # 不論產物是否仍有效都重新建立
+
+產物（<模板檔名>.compiled）以模板內容的 SHA-256 判斷是否有效，轉換行程第一次用到模板時
+直接載入產物，不必再解析整份模板；產物不存在或已過期時，轉換引擎也會自行重建。
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from process_ppt import CompiledTemplate, load_template_artifact, template_artifact_path, write_template_artifact
+
+PROJECT_ROOT = Path(__file__).parent.absolute().parent
+DEFAULT_TEMPLATE_DIR = PROJECT_ROOT / 'ppt' / 'template'
+
+
+def find_templates(template_dir=DEFAULT_TEMPLATE_DIR):
+    """回傳資料夾中的模板路徑（依檔名排序）；資料夾不存在時回傳空列表"""
+    template_dir = Path(template_dir)
+    if not template_dir.is_dir():
+        return []
+    return sorted(template_dir.glob('*.pptx'))
+
+
+def build_templates(template_dir=DEFAULT_TEMPLATE_DIR, force=False):
+    """為每個模板建立產物，回傳 [{'template', 'artifact', 'status', 'elapsed', 'error'}]
+
+    status 為 'fresh'（產物仍有效）、'built'（重新建立）或 'failed'。
+    """
+    results = []
+    for template_path in find_templates(template_dir):
+        started = time.perf_counter()
+        result = {
+            'template': str(template_path),
+            'artifact': template_artifact_path(template_path),
+            'status': 'fresh',
+            'error': None
+        }
+        try:
+            if force or load_template_artifact(template_path) is None:
+                write_template_artifact(CompiledTemplate(template_path))
+                result['status'] = 'built'
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+        result['elapsed'] = time.perf_counter() - started
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="建立預先編譯的模板產物")
+    parser.add_argument('--template-dir', default=str(DEFAULT_TEMPLATE_DIR), help="模板資料夾")
+    parser.add_argument('--force', action='store_true', help="不論產物是否有效都重新建立")
+    parser.add_argument('-v', '--verbose', action='store_true', help="顯示轉換引擎的記錄")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(message)s')
+
+    results = build_templates(args.template_dir, force=args.force)
+    if not results:
+        print(f"在 {args.template_dir} 找不到模板")
+        return 1
+
+    for result in results:
+        name = os.path.basename(result['template'])
+        if result['status'] == 'failed':
+            print(f"❌ {name}: {result['error']}")
+        else:
+            size = os.path.getsize(result['artifact']) / 1024
+            label = '已建立' if result['status'] == 'built' else '仍有效'
+            print(f"✅ {name}: {label}（{size:.0f} KB，{result['elapsed'] * 1000:.0f} ms）")
+    return 1 if any(result['status'] == 'failed' for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())